@@ -5,12 +5,21 @@ src
 This package provides main functionalities of the project.
 
 Modules:
+- bibtex_index: Indexes the BibTeX references and the notes citing them.
 - create_note: [Brief description of module1]
+- graph_analytics: Computes orphans, hubs, components and PageRank of the link network.
 - link_note: [Brief description of module2]
 - list_all_notes: [Brief description of module2]
 - main: [Brief description of module2]
+- note_locks: Striped file locks that keep concurrent note writers from losing updates.
 - note_model: [Brief description of module2]
+- note_parser: Parses the plain text note format into NoteModel instances.
+- query_notes: Structured queries over the notes with an index-aware planner.
 - search_notes: [Brief description of module2]
+- serializers: Serializes notes as text, JSON or compact binary records.
+- timeline_index: Sorted index of the notes by creation time for timeline queries.
+- validate_notes: Validates the format of every note in parallel and reports the issues.
+- vault_snapshot: Stores all parsed notes in one binary snapshot file for fast loading.
 
 Key Features:
 - Manage Notes in a Zettelkasten sytem.
@@ -33,3 +42,9 @@ License:
 NOTES_DIR_INBOX = 'notes/inbox'
 NOTES_DIR_PERMA = 'notes/permanent_notes'
 UID_FORMAT = "%Y%m%d-%H%M%S"
+SNAPSHOT_PATH = 'notes/.vault_snapshot.bin'
+BIBTEX_PATH = 'bibtex_references/reference.bib'
+TIMELINE_PATH = 'notes/.timeline_index.bin'
+VALIDATION_CACHE_PATH = 'notes/.validation_cache.json'
+LOCKS_DIR = 'notes/.locks'
+QUERY_INDEX_PATH = 'notes/.query_index.json'
@@ -0,0 +1,320 @@
+"""
+bibtex_index.py
+------------
+
+This module links the citations of the notes to the entries of the BibTeX reference file.
+
+Notes cite their sources as `@citationkey` in their References section. The BibTeX file can
+grow to several megabytes, so instead of parsing it as a whole, it is scanned once for the
+citation key and byte range of every entry, and a single entry is only parsed when it is
+requested.
+
+Classes:
+- BibtexIndex: Indexes the entries of a BibTeX file by citation key with byte offsets.
+
+Functions:
+- parse_bibtex_entry: Parses the text of one BibTeX entry into a dictionary.
+- extract_citation_keys: Returns the citation keys referenced by a note.
+- build_citation_index: Builds the reverse index from citation key to the notes that cite it.
+- resolve_references: Resolves every reference of a note to its BibTeX entry.
+
+Key Features:
+- Streaming scan of the BibTeX file through mmap, without decoding or parsing the fields.
+- Incremental refresh: an unchanged file is not scanned again and appended entries are scanned
+    from the previous end of the file only.
+
+Usage:
+bib_index = BibtexIndex()
+citations = build_citation_index(refresh_snapshot())
+citations.get('calnewport2016deepwork', [])
+resolve_references(note, bib_index)
+
+Dependencies:
+. import BIBTEX_PATH: Imports the path of the BibTeX file from __init__.py
+mmap, os, re, zlib
+
+Author:
+Hector Alejandro Vargas Gutierrez
+
+License:
+[Specify the license under which the package is distributed, if applicable.]
+
+"""
+import mmap
+import os
+import re
+import zlib
+
+from . import BIBTEX_PATH
+
+# Start of an entry: "@type{key," at the beginning of a line; group 2 is the opening delimiter
+ENTRY_PATTERN = re.compile(
+    rb"^[ \t]*@[ \t]*(\w+)[ \t]*([{(])[ \t]*([^,\s{}()]+)[ \t]*,", re.MULTILINE
+)
+
+# Braces and parentheses, followed to find the delimiter that closes an entry
+DELIMITER_PATTERN = re.compile(rb"[{}()]")
+
+# Any "@" at the beginning of a line, where an entry missing its closing delimiter ends
+BOUNDARY_PATTERN = re.compile(rb"^[ \t]*@", re.MULTILINE)
+
+# Entry types that do not hold references
+SPECIAL_TYPES = {b"comment", b"string", b"preamble"}
+
+# Citation keys in the References section of a note, e.g. "Source: @calnewport2016deepwork"
+CITATION_PATTERN = re.compile(r"@([^\s,;{}()\[\]@]+)")
+
+# Number of bytes before the previous end of file checked to detect appends
+TAIL_SIZE = 256
+
+
+def _read_value(entry_text, position):
+    """Return the field value starting at `position`, without delimiters, and the next position."""
+    length = len(entry_text)
+    if entry_text[position] not in "{\"":
+        # Bare value such as a number or a @string macro name
+        end = position
+        while end < length and entry_text[end] not in ",})\n":
+            end += 1
+        return entry_text[position:end], end
+
+    # Delimited value, find the matching closing delimiter
+    closing = "}" if entry_text[position] == "{" else "\""
+    depth = 0
+    start = position + 1
+    position += 1
+    while position < length:
+        char = entry_text[position]
+        if char == "{":
+            depth += 1
+        elif char == "}" and depth > 0:
+            depth -= 1
+        elif char == closing and depth == 0:
+            break
+        position += 1
+    return entry_text[start:position], position + 1
+
+
+def parse_bibtex_entry(entry_text):
+    """
+    Parse the text of one BibTeX entry into a dictionary.
+
+    Field values may be delimited by braces (which can nest), double quotes or be bare words
+    such as numbers. The outer delimiters are removed and whitespace is collapsed.
+
+    Args:
+        entry_text (str): The text of the entry, starting at its "@".
+
+    Returns:
+        dict: The field names (in lower case) and their values, plus 'ENTRYTYPE' and 'ID'.
+              Returns None if the text is not an entry.
+    """
+    match = re.match(r"\s*@\s*(\w+)\s*[{(]\s*([^,\s{}()]+)\s*,", entry_text)
+    if not match:
+        return None
+
+    entry = {'ENTRYTYPE': match.group(1).lower(), 'ID': match.group(2)}
+    position = match.end()
+    length = len(entry_text)
+    field_pattern = re.compile(r"\s*([\w\-:.]+)\s*=\s*")
+
+    while position < length:
+        field_match = field_pattern.match(entry_text, position)
+        if not field_match:
+            break
+        name = field_match.group(1).lower()
+        position = field_match.end()
+        if position >= length:
+            break
+
+        value, position = _read_value(entry_text, position)
+        entry[name] = " ".join(value.split())
+
+        # Skip to the next field
+        while position < length and entry_text[position] in " \t\r\n,":
+            position += 1
+        if position < length and entry_text[position] in "})":
+            break
+
+    return entry
+
+
+def _entry_end(data, match):
+    """
+    Return the byte position just past the delimiter closing the entry started by `match`.
+
+    Braces are counted from the opening delimiter on, so a line of a field value starting with
+    "@" does not end the entry. An entry that is never closed ends at the next line starting
+    with "@", or at the end of the data.
+    """
+    closing = b"}" if match.group(2) == b"{" else b")"
+    depth = 0
+    for delimiter in DELIMITER_PATTERN.finditer(data, match.end()):
+        char = delimiter.group()
+        if char == b"{":
+            depth += 1
+        elif char == b"}" and depth > 0:
+            depth -= 1
+        elif char == closing and depth == 0:
+            return delimiter.end()
+    boundary = BOUNDARY_PATTERN.search(data, match.end())
+    return boundary.start() if boundary else len(data)
+
+
+class BibtexIndex:
+    """
+    Indexes the entries of a BibTeX file by citation key with byte offsets.
+
+    Attributes:
+        path (str): The path of the BibTeX file.
+        offsets (dict): Maps each citation key to the (offset, length) of its entry in bytes.
+    """
+
+    def __init__(self, path=BIBTEX_PATH):
+        """
+        Create the index and scan the BibTeX file.
+
+        Args:
+            path (str): The path of the BibTeX file.
+        """
+        self.path = path
+        self.offsets = {}
+        self._signature = None
+        self._tail_crc = None
+        self.refresh()
+
+    def _scan(self, data, start):
+        """Index the entries of `data` found from byte `start` on."""
+        match = ENTRY_PATTERN.search(data, start)
+        while match:
+            end = _entry_end(data, match)
+            if match.group(1).lower() not in SPECIAL_TYPES:
+                key = match.group(3).decode('utf-8', 'replace')
+                self.offsets[key] = (match.start(), end - match.start())
+            # An "@" line inside a field value of this entry does not start a new one
+            match = ENTRY_PATTERN.search(data, end)
+
+    def refresh(self):
+        """
+        Bring the index up to date with the BibTeX file.
+
+        Nothing is read if the file size and modification time did not change. If the file only
+        grew and its previous last bytes are unchanged, only the entry that ended the file and
+        the appended bytes are scanned. Otherwise the whole file is scanned again.
+
+        Returns:
+            bool: True if the index changed.
+        """
+        if not os.path.exists(self.path):
+            changed = bool(self.offsets)
+            self.offsets = {}
+            self._signature = None
+            return changed
+
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+
+        with open(self.path, 'rb') as f:
+            if stat.st_size == 0:
+                data = b""
+            else:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                old_size = self._signature[1] if self._signature else 0
+                appended = (
+                    self._signature is not None
+                    and stat.st_size > old_size
+                    and self._tail_crc == zlib.crc32(data[max(0, old_size - TAIL_SIZE):old_size])
+                )
+                if appended:
+                    # Rescan from the last known entry, which may have been extended
+                    start = max((offset for offset, _ in self.offsets.values()), default=0)
+                    self._scan(data, start)
+                else:
+                    self.offsets = {}
+                    self._scan(data, 0)
+                self._tail_crc = zlib.crc32(data[max(0, stat.st_size - TAIL_SIZE):stat.st_size])
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+        self._signature = signature
+        return True
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get_entry(self, key):
+        """
+        Read and parse a single entry of the BibTeX file.
+
+        Args:
+            key (str): The citation key of the entry.
+
+        Returns:
+            dict: The parsed entry (see parse_bibtex_entry), or None if the key is unknown.
+        """
+        if key not in self.offsets:
+            return None
+        offset, length = self.offsets[key]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            entry_text = f.read(length).decode('utf-8', 'replace')
+        return parse_bibtex_entry(entry_text)
+
+
+def extract_citation_keys(note):
+    """
+    Return the citation keys referenced by a note.
+
+    Args:
+        note (NoteModel): The note.
+
+    Returns:
+        list of str: The citation keys, in order of appearance and without duplicates.
+    """
+    keys = []
+    for reference in note.metadata.references:
+        for key in CITATION_PATTERN.findall(reference):
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+
+def build_citation_index(notes):
+    """
+    Build the reverse index from citation key to the notes that cite it.
+
+    Args:
+        notes (dict): Maps each note file path to its NoteModel, as returned by refresh_snapshot.
+
+    Returns:
+        dict: Maps each citation key to the sorted list of file paths of the notes citing it.
+    """
+    citations = {}
+    for filepath, note in notes.items():
+        for key in extract_citation_keys(note):
+            citations.setdefault(key, []).append(filepath)
+    for filepaths in citations.values():
+        filepaths.sort()
+    return citations
+
+
+def resolve_references(note, bib_index):
+    """
+    Resolve every reference of a note to its BibTeX entry.
+
+    Args:
+        note (NoteModel): The note.
+        bib_index (BibtexIndex): The index of the BibTeX file.
+
+    Returns:
+        dict: Maps each citation key of the note to its parsed entry, or None if the key is not
+              in the BibTeX file.
+    """
+    return {key: bib_index.get_entry(key) for key in extract_citation_keys(note)}
@@ -17,6 +17,9 @@ called in main.
 Dependencies:
 . import UID_FORMAT, NOTES_DIR_INBOX: Imports UID_FORMAT and NOTES_DIR_INBOX from __init__.py
 .note_model import NoteModel: Imports the NoteModel class
+.serializers import write_note: Imports the function that writes a note to a file
+.note_locks import lock_notes: Imports the lock held while the note is written
+.timeline_index import add_note_to_timeline: Imports the function that indexes the new note
 os
 datetime
 uuid: Imports the uuid module to generate UUIDs
@@ -34,6 +37,9 @@ import uuid
 
 from . import UID_FORMAT, NOTES_DIR_INBOX
 from .note_model import NoteModel
+from .serializers import write_note
+from .note_locks import lock_notes
+from .timeline_index import add_note_to_timeline
 
 # Generate ZK_UID
 def generate_zk_uid():
@@ -77,6 +83,7 @@ def create_note(note: NoteModel):
     zk_uid = generate_zk_uid()
 
     note.identifiers.uuid = note_uuid
+    note.identifiers.zk_uid = zk_uid
 
     # Create a filename based on the ZK_UID and title, replacing spaces with underscores
     filename = f"{zk_uid}-{note.contents.title.replace(' ', '_')}.txt"
@@ -84,8 +91,11 @@ def create_note(note: NoteModel):
     # Construct the full file path in the "notes" directory
     filepath = os.path.join(NOTES_DIR_INBOX, filename)
 
-    # Open the file in write mode and write the note's content using the NoteModel's __str__ method
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(str(note))
+    # Write the note's content in the text format of the NoteModel's __str__ method
+    with lock_notes([filepath]):
+        write_note(filepath, note)
+
+    # Keep the timeline index up to date with the new note
+    add_note_to_timeline(note, filepath)
 
     print(f"Note created successfully with UUID: {note_uuid}")
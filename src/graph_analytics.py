@@ -0,0 +1,270 @@
+"""
+graph_analytics.py
+------------
+
+This module computes vault health metrics over the network of links between notes.
+
+The forward and backward links stored in every NoteModel are turned once into an edge list
+held in compact integer arrays, and every metric is computed from those arrays.
+
+Functions:
+- build_edge_list: Builds the deduplicated edge list of the link network.
+- pagerank: Computes PageRank centrality by power iteration.
+- connected_components: Labels the weakly connected components with union-find.
+- analyze_vault: Computes orphans, hubs, components and PageRank for a set of notes.
+- format_report: Formats the result of analyze_vault as a text report.
+
+Key Features:
+- Edges are stored in `array('l')` columns and grouped by target node (CSR layout), so each
+    PageRank iteration is one pass of C-level sums instead of a Python loop over the edges.
+- Union-find with path halving and union by size for the components.
+
+Usage:
+analysis = analyze_vault(refresh_snapshot())
+print(format_report(analysis))
+
+Dependencies:
+array, operator
+
+Author:
+Hector Alejandro Vargas Gutierrez
+
+License:
+[Specify the license under which the package is distributed, if applicable.]
+
+"""
+from array import array
+from operator import mul, sub
+
+# Maximum number of PageRank power iterations
+PAGERANK_MAX_ITERATIONS = 100
+
+
+def build_edge_list(notes):
+    """
+    Build the deduplicated edge list of the link network.
+
+    A forward link from note A to note B and a backward link in note B from note A describe
+    the same edge A -> B, so both are merged. Links to ZK_UIDs that no note has are counted
+    as broken and left out of the graph.
+
+    Args:
+        notes (dict): Maps each note file path to its NoteModel, as returned by refresh_snapshot.
+
+    Returns:
+        tuple: The list of node ZK_UIDs, the source and target arrays of node indices and the
+               number of broken links.
+    """
+    uids = []
+    node_index = {}
+    for note in notes.values():
+        zk_uid = note.identifiers.zk_uid
+        if zk_uid and zk_uid not in node_index:
+            node_index[zk_uid] = len(uids)
+            uids.append(zk_uid)
+
+    edges = set()
+    broken = 0
+    for note in notes.values():
+        node = node_index.get(note.identifiers.zk_uid)
+        if node is None:
+            continue
+        for link in note.links.forward:
+            other = node_index.get(link['ZK_UID'])
+            if other is None:
+                broken += 1
+            elif other != node:
+                edges.add((node, other))
+        for link in note.links.backward:
+            other = node_index.get(link['ZK_UID'])
+            if other is None:
+                broken += 1
+            elif other != node:
+                edges.add((other, node))
+
+    sources = array('l')
+    targets = array('l')
+    for source, target in edges:
+        sources.append(source)
+        targets.append(target)
+    return uids, sources, targets, broken
+
+
+def _incoming_edges(node_count, sources, targets):
+    """
+    Group the edges by target node (CSR layout).
+
+    Returns:
+        tuple: The array of source nodes of the incoming edges of every node, the inverse out
+               degree of every node (0.0 without outgoing links) and the nodes without outgoing
+               links.
+    """
+    incoming = [array('l') for _ in range(node_count)]
+    out_degree = [0] * node_count
+    for source, target in zip(sources, targets):
+        incoming[target].append(source)
+        out_degree[source] += 1
+
+    inverse_degree = [1.0 / degree if degree else 0.0 for degree in out_degree]
+    dangling = [node for node, degree in enumerate(out_degree) if degree == 0]
+    return incoming, inverse_degree, dangling
+
+
+def pagerank(node_count, sources, targets, damping=0.85, tolerance=1.0e-6):
+    """
+    Compute PageRank centrality by power iteration.
+
+    The rank of the nodes without outgoing links is spread evenly over all nodes. The iteration
+    stops after PAGERANK_MAX_ITERATIONS iterations at most.
+
+    Args:
+        node_count (int): The number of nodes.
+        sources (array of int): The source node of every edge.
+        targets (array of int): The target node of every edge.
+        damping (float): The probability of following a link instead of jumping anywhere.
+        tolerance (float): The L1 change between iterations at which the iteration stops.
+
+    Returns:
+        list of float: The PageRank of every node, summing to 1.
+    """
+    if node_count == 0:
+        return []
+
+    # Each node sums the contributions of the sources of its incoming edges
+    incoming, inverse_degree, dangling = _incoming_edges(node_count, sources, targets)
+
+    rank = [1.0 / node_count] * node_count
+    for _ in range(PAGERANK_MAX_ITERATIONS):
+        contribution = list(map(mul, rank, inverse_degree))
+        dangling_rank = sum(map(rank.__getitem__, dangling))
+        base = (1.0 - damping + damping * dangling_rank) / node_count
+        new_rank = [base + damping * sum(map(contribution.__getitem__, sources_of_node))
+                    for sources_of_node in incoming]
+        change = sum(map(abs, map(sub, new_rank, rank)))
+        rank = new_rank
+        if change < tolerance:
+            break
+    return rank
+
+
+def connected_components(node_count, sources, targets):
+    """
+    Label the weakly connected components with union-find.
+
+    Args:
+        node_count (int): The number of nodes.
+        sources (array of int): The source node of every edge.
+        targets (array of int): The target node of every edge.
+
+    Returns:
+        list of int: The component label (the index of a representative node) of every node.
+    """
+    parent = list(range(node_count))
+    size = [1] * node_count
+
+    def find(node):
+        while parent[node] != node:
+            # Path halving
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for source, target in zip(sources, targets):
+        root_a = find(source)
+        root_b = find(target)
+        if root_a != root_b:
+            if size[root_a] < size[root_b]:
+                root_a, root_b = root_b, root_a
+            parent[root_b] = root_a
+            size[root_a] += size[root_b]
+
+    return [find(node) for node in range(node_count)]
+
+
+def _degree_metrics(uids, sources, targets, top):
+    """
+    Return the orphans and the hubs of the link network.
+
+    Returns:
+        tuple: The ZK_UIDs of the notes without links and the (ZK_UID, in degree, out degree)
+               of the `top` most linked notes.
+    """
+    in_degree = [0] * len(uids)
+    out_degree = [0] * len(uids)
+    for source, target in zip(sources, targets):
+        out_degree[source] += 1
+        in_degree[target] += 1
+
+    orphans = [uids[node] for node in range(len(uids))
+               if in_degree[node] == 0 and out_degree[node] == 0]
+
+    by_degree = sorted(range(len(uids)), key=lambda node: in_degree[node] + out_degree[node],
+                       reverse=True)
+    hubs = [(uids[node], in_degree[node], out_degree[node]) for node in by_degree[:top]
+            if in_degree[node] + out_degree[node] > 0]
+    return orphans, hubs
+
+
+def analyze_vault(notes, top=10):
+    """
+    Compute orphans, hubs, weakly connected components and PageRank for a set of notes.
+
+    Args:
+        notes (dict): Maps each note file path to its NoteModel, as returned by refresh_snapshot.
+        top (int): How many hubs and central notes to report.
+
+    Returns:
+        dict: The metrics, with the keys 'notes', 'edges', 'broken_links', 'orphans' (list of
+              ZK_UIDs), 'hubs' (list of (ZK_UID, in degree, out degree)), 'components' (list of
+              component sizes, largest first) and 'pagerank' (list of (ZK_UID, rank)).
+    """
+    uids, sources, targets, broken = build_edge_list(notes)
+    node_count = len(uids)
+    orphans, hubs = _degree_metrics(uids, sources, targets, top)
+
+    component_sizes = {}
+    for label in connected_components(node_count, sources, targets):
+        component_sizes[label] = component_sizes.get(label, 0) + 1
+
+    rank = pagerank(node_count, sources, targets)
+    by_rank = sorted(range(node_count), key=rank.__getitem__, reverse=True)
+
+    return {
+        'notes': node_count,
+        'edges': len(sources),
+        'broken_links': broken,
+        'orphans': orphans,
+        'hubs': hubs,
+        'components': sorted(component_sizes.values(), reverse=True),
+        'pagerank': [(uids[node], rank[node]) for node in by_rank[:top]],
+    }
+
+
+def format_report(analysis):
+    """
+    Format the result of analyze_vault as a text report.
+
+    Args:
+        analysis (dict): The result of analyze_vault.
+
+    Returns:
+        str: The report.
+    """
+    components = analysis['components']
+    lines = [
+        "Vault health report",
+        f"Notes: {analysis['notes']}",
+        f"Links: {analysis['edges']}",
+        f"Broken links: {analysis['broken_links']}",
+        f"Orphan notes: {len(analysis['orphans'])}",
+    ]
+    lines.extend(f"  {zk_uid}" for zk_uid in analysis['orphans'])
+    lines.append(f"Connected components: {len(components)} "
+                 f"(largest: {components[0] if components else 0}, "
+                 f"single notes: {components.count(1)})")
+    lines.append("Hub notes (in/out links):")
+    lines.extend(f"  {zk_uid} ({in_links}/{out_links})"
+                 for zk_uid, in_links, out_links in analysis['hubs'])
+    lines.append("Central notes (PageRank):")
+    lines.extend(f"  {zk_uid} {rank:.6f}" for zk_uid, rank in analysis['pagerank'])
+    return "\n".join(lines)
@@ -18,10 +18,6 @@ Functions:
         updates backward links in the linked notes.
     - link_backward_notes(note_uid, linked_uids, address): Adds backward links to a note based on 
         its ZK_UID.
-    - parse_note_data(note_data): Parses raw note data into a dictionary using predefined 
-        section keywords.
-    - dict_to_note_model(parsed_dict): Converts a dictionary of parsed note data into a 
-        `NoteModel` instance.
 
 Usage:
     This module is intended for use within a Zettelkasten system where notes are linked together 
@@ -30,8 +26,9 @@ Usage:
 
 Dependencies:
     - `os`: For file and directory operations.
-    - `re`: For regular expression operations, used in parsing note data.
-    - `datetime`: For handling date and time information.
+    - `note_parser`: For parsing the note files into `NoteModel` instances.
+    - `serializers`: For writing notes back to their files.
+    - `note_locks`: For locking the notes while they are read, modified and written.
 
 Author:
     [Your Name]
@@ -40,11 +37,10 @@ License:
     [Your License]
 """
 import os
-import re
 
-from datetime import datetime
-
-from .note_model import NoteModel, NoteIdentifiers, NoteLinks, NoteMetadata, NoteContent
+from .note_parser import parse_note_data
+from .serializers import write_note
+from .note_locks import lock_notes
 
 def find_note_filepath(note_uid, directories):
     """
@@ -59,7 +55,7 @@ def find_note_filepath(note_uid, directories):
     """
     for directory in directories:
         for filename in os.listdir(directory):
-            if filename.startswith(note_uid):
+            if filename.startswith(note_uid) and filename.endswith(".txt"):
                 return os.path.join(directory, filename)
     return None
 
@@ -91,6 +87,8 @@ def link_forward_notes(note_uid1, linked_uids, directories):
           will be printed.
         - The function updates both the forward links in the main note and the backward links 
           in each linked note, and then saves the changes to the corresponding files.
+        - All the notes involved are locked from before they are read until they are written,
+          so concurrent linkers do not lose each other's links.
     """
     # Find the file path for note_uid1
     filepath1 = find_note_filepath(note_uid1, directories)
@@ -99,40 +97,38 @@ def link_forward_notes(note_uid1, linked_uids, directories):
         print(f"Note with ZK_UID {note_uid1} not found.")
         return
 
-    # Load the existing note from the file
-    with open(filepath1, 'r', encoding='utf-8') as f:
-        note_data1 = f.read()
-
-    # Parse the note into a NoteModel instance
-    note1 = parse_note_data(note_data1)
-
-    # Add the forward linked UIDs to the note
+    # Find the file paths of the linked notes (note_uid0)
+    linked_filepaths = []
     for link in linked_uids:
-        note1.add_forward_link(link['ZK_UID'], link['Description'])
-
-        # Find the file path for the linked note (note_uid0)
         filepath0 = find_note_filepath(link['ZK_UID'], directories)
-
-        if filepath0:
-            # Load the linked note
-            with open(filepath0, 'r', encoding='utf-8') as f:
-                note_data0 = f.read()
-
-            # Parse the linked note into a NoteModel instance
-            note0 = parse_note_data(note_data0)
+        if not filepath0:
+            print(f"Linked note with ZK_UID {link['ZK_UID']} not found.")
+        linked_filepaths.append(filepath0)
+
+    # Lock every note that will be rewritten before reading any of them, so concurrent
+    # linkers cannot overwrite each other's links
+    filepaths = [filepath1] + [filepath0 for filepath0 in linked_filepaths if filepath0]
+    with lock_notes(filepaths):
+        # Load and parse each note once, even if it is linked several times
+        notes = {}
+        for filepath in filepaths:
+            if filepath not in notes:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    notes[filepath] = parse_note_data(f.read())
+        note1 = notes[filepath1]
+
+        for link, filepath0 in zip(linked_uids, linked_filepaths):
+            # Add the forward linked UID to the note
+            note1.add_forward_link(link['ZK_UID'], link['Description'])
 
             # Add the backward link in the linked note
-            note0.add_backward_link(note_uid1, f"Linked from: {note1.contents.title}")
+            if filepath0:
+                notes[filepath0].add_backward_link(note_uid1,
+                                                   f"Linked from: {note1.contents.title}")
 
-            # Save the updated linked note back to the file
-            with open(filepath0, 'w', encoding='utf-8') as f:
-                f.write(str(note0))
-        else:
-            print(f"Linked note with ZK_UID {link['ZK_UID']} not found.")
-
-    # Save the updated note1 back to the file
-    with open(filepath1, 'w', encoding='utf-8') as f:
-        f.write(str(note1))
+        # Save the updated notes back to their files
+        for filepath, note in notes.items():
+            write_note(filepath, note)
 
 def link_backward_notes(note_uid, linked_uids, address):
     """
@@ -152,134 +148,22 @@ def link_backward_notes(note_uid, linked_uids, address):
         None
     """
     # Find the filename of the note that starts with the specified ZK_UID
-    filename = [f for f in os.listdir(address) if f.startswith(note_uid)][0]
+    filename = [f for f in os.listdir(address) if f.startswith(note_uid) and f.endswith(".txt")][0]
 
     # Construct the full file path to the note
     filepath = os.path.join(address, filename)
 
-    # Load the existing note from the file
-    with open(filepath, 'r', encoding='utf-8') as f:
-        note_data = f.read()
-
-    # Parse the note into a NoteModel instance
-    note = parse_note_data(note_data)
-
-    # Add the linked UIDs to the backward links list
-    for link in linked_uids:
-        note.add_backward_link(link['ZK_UID'], link['Description'])
-
-    # Save the updated note back to the file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(str(note))
-
-def parse_note_data(note_data):
-    """
-    Parse the raw note data into a dictionary using predefined section keywords as delimiters.
-
-    Args:
-        note_data (str): The raw content of the note file.
-
-    Returns:
-        dict: A dictionary where keys are section names and values are the corresponding content.
-    """
-    # Define the section keywords that delimit each part of the note
-    sections = [
-        "uuid",
-        "Title",
-        "ZK_UID",
-        "Date",
-        "Content",
-        "References",
-        "Tags",
-        "Links forward to Other Notes",
-        "Linked backward from Other Notes",
-        "Thoughts/Connections"
-    ]
-
-    # Create a regex pattern to match each section
-    pattern = re.compile(rf"({'|'.join(sections)}):?")
-
-    # Split the note data into sections based on the defined pattern
-    splits = pattern.split(note_data)
-
-    # Initialize a dictionary to hold the parsed note data
-    note_dict = {}
-
-    # Iterate over the splits to populate the dictionary
-    for i in range(1, len(splits), 2):
-        section_name = splits[i].strip()
-        content = splits[i + 1].strip()
-        note_dict[section_name] = content
-
-    # Separate forward and backward links into their own lists
-    if "Links forward to Other Notes" in note_dict:
-        pattern = r"ZK_UID \d{3,4}[A-Z]-[0-9.]+-[0-9]{3} \([^)]+\)"
-        links = re.findall(pattern, note_dict["Links forward to Other Notes"])
-        note_dict["Links forward to Other Notes"] = links
-
-    if "Linked backward from Other Notes" in note_dict:
-        pattern = r"ZK_UID \d{3,4}[A-Z]-[0-9.]+-[0-9]{3} \([^)]+\)"
-        linked_backward_notes = re.findall(pattern, note_dict["Linked backward from Other Notes"])
-        note_dict["Linked backward from Other Notes"] = linked_backward_notes
-
-    return dict_to_note_model(note_dict)
-
-
-def dict_to_note_model(parsed_dict):
-    """
-    Convert a dictionary of parsed note data into a NoteModel instance.
-
-    Args:
-        parsed_dict (dict): A dictionary containing the parsed note data.
-
-    Returns:
-        NoteModel: An instance of NoteModel populated with the data from the dictionary.
-    """
-    def parse_links(link_data):
-        """Helper function to parse links."""
-        links = []
-        for link in link_data.split("\n"):
-            if link.startswith("Related to: ZK_UID"):
-                uid_desc = link.split("ZK_UID ")[1].split(" (")
-                links.append({"ZK_UID": uid_desc[0], "Description": uid_desc[1][:-1]})
-        return links
-
-    def parse_list(data, delimiter=" "):
-        """Helper function to parse a list from a string."""
-        return data.split(delimiter) if data else []
-
-    # Extract data from the dictionary
-    title = parsed_dict.get("Title", "")
-    zk_uid = parsed_dict.get("ZK_UID", "")
-    content = parsed_dict.get("Content", "")
-    date = parsed_dict.get("Date", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-
-    references = parse_list(parsed_dict.get("References", ""), ", ")
-    tags = parse_list(parsed_dict.get("Tags", " "))
+    with lock_notes([filepath]):
+        # Load the existing note from the file
+        with open(filepath, 'r', encoding='utf-8') as f:
+            note_data = f.read()
 
-    forward_links = parse_links(parsed_dict.get("Links forward to Other Notes", ""))
-    backward_links = parse_links(parsed_dict.get("Linked backward from Other Notes", ""))
+        # Parse the note into a NoteModel instance
+        note = parse_note_data(note_data)
 
-    thoughts_connections = parsed_dict.get("Thoughts/Connections", "")
+        # Add the linked UIDs to the backward links list
+        for link in linked_uids:
+            note.add_backward_link(link['ZK_UID'], link['Description'])
 
-    # Create and return the NoteModel instance
-    return NoteModel(
-        identifiers=NoteIdentifiers(
-            uuid=parsed_dict.get("UUID", ""),
-            zk_uid=zk_uid
-        ),
-        date=date,
-        metadata=NoteMetadata(
-            references=references,
-            tags=tags
-        ),
-        links=NoteLinks(
-            forward=forward_links,
-            backward=backward_links
-        ),
-        contents=NoteContent(
-            title=title,
-            content=content,
-            thoughts_connections=thoughts_connections
-        )
-    )
+        # Save the updated note back to the file
+        write_note(filepath, note)
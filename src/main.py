@@ -22,6 +22,9 @@ Functions:
     list_inbox_notes(): Lists all notes in the inbox directory.
     list_permanent_notes(): Lists all notes in the permanent notes directory.
     link_notes_action(): Manages the linking of notes based on user input.
+    vault_health_report(): Prints orphans, hubs, components and PageRank of the link network.
+    validate_all_notes(): Checks the format of every note and prints the issues found.
+    query_notes_action(): Runs a structured query over all notes.
 
 Usage:
     Run this module as a script to start the Zettelkasten Note Manager CLI. The user will be 
@@ -47,6 +50,10 @@ from . create_note import create_note
 from . search_notes import search_notes
 from . link_notes import link_forward_notes
 from . list_all_notes import list_all_notes
+from . vault_snapshot import refresh_snapshot
+from . graph_analytics import analyze_vault, format_report
+from . validate_notes import validate_notes, format_issues
+from . query_notes import execute_query, format_plan
 from . import NOTES_DIR_INBOX  # Directory where all the notes are stored
 from . import NOTES_DIR_PERMA  # Directory where all the notes are stored
 
@@ -123,6 +130,30 @@ def link_notes_action():
     link_forward_notes(note_uid, linked_uids, NOTES_DIR_PERMA)
     print("Notes linked successfully.")
 
+def vault_health_report():
+    """Prints the health report of the link network of all notes."""
+    notes = refresh_snapshot([NOTES_DIR_INBOX, NOTES_DIR_PERMA])
+    print(format_report(analyze_vault(notes)))
+
+def validate_all_notes():
+    """Checks the format of every note and prints the issues found."""
+    print(format_issues(validate_notes([NOTES_DIR_INBOX, NOTES_DIR_PERMA])))
+
+def query_notes_action():
+    """Runs a structured query over all notes."""
+    query = input("Enter query (e.g. tag:#Writing date:2024-08.. \"morning routine\"): ")
+    explain = input("Show the query plan? (y/n): ").strip().lower() == 'y'
+    try:
+        results, stages = execute_query(query)
+    except ValueError as error:
+        print(f"Invalid query: {error}")
+        return
+    if explain:
+        print(format_plan(stages))
+    print(f"Found {len(results)} notes:")
+    for result in results:
+        print(result)
+
 def main():
     """
     Main function for the Zettelkasten Note Manager command-line interface.
@@ -136,7 +167,11 @@ def main():
         print("4. List all inbox notes")
         print("5. List all permanent notes")
         print("6. Link notes")
+        # Exit keeps the number 7 it always had, entries added later are numbered after it
         print("7. Exit")
+        print("8. Vault health report")
+        print("9. Validate notes")
+        print("10. Query notes")
 
         # Get user choice
         choice = input("Enter your choice: ")
@@ -156,6 +191,12 @@ def main():
             link_notes_action()
         elif choice == '7':
             break
+        elif choice == '8':
+            vault_health_report()
+        elif choice == '9':
+            validate_all_notes()
+        elif choice == '10':
+            query_notes_action()
         else:
             print("Invalid choice. Please try again.")
 
@@ -0,0 +1,103 @@
+"""
+note_locks.py
+------------
+
+This module lets several processes update notes at the same time without losing updates.
+
+Every note path is mapped to one of a fixed number of lock stripes, each one a small lock file
+locked with an `fcntl` advisory lock. A writer locks the stripes of every note it is going to
+read and rewrite before reading any of them, and always acquires the stripes in ascending
+order, so two writers can never wait on each other in a cycle.
+
+Functions:
+- lock_stripe: Returns the stripe number of a note path.
+- lock_notes: Context manager holding the locks of a set of note paths.
+
+Key Features:
+- Striped locks: a bounded number of lock files, whatever the size of the vault.
+- Deterministic lock order to avoid deadlocks.
+- `fcntl.flock` locks are released by the operating system if a writer dies.
+
+Usage:
+with lock_notes([filepath1, filepath2]):
+    # read, modify and write both notes
+
+The concurrent linking stress test is in tests/test_note_locks.py; run
+`python -m tests.test_note_locks` to print the linking throughput under contention.
+
+Dependencies:
+. import LOCKS_DIR: Imports the directory of the lock files from __init__.py
+contextlib, fcntl, os, zlib
+
+Author:
+Hector Alejandro Vargas Gutierrez
+
+License:
+[Specify the license under which the package is distributed, if applicable.]
+
+"""
+import os
+import zlib
+from contextlib import contextmanager
+
+from . import LOCKS_DIR
+
+# fcntl is not available on Windows, where notes are not locked
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # pragma: no cover
+    HAS_FCNTL = False
+
+# Number of lock files the note paths are spread over
+LOCK_STRIPES = 64
+
+
+def lock_stripe(filepath, stripes=LOCK_STRIPES):
+    """
+    Return the stripe number of a note path.
+
+    Args:
+        filepath (str): The path of the note.
+        stripes (int): The number of stripes.
+
+    Returns:
+        int: The stripe number, between 0 and stripes - 1.
+    """
+    return zlib.crc32(os.path.abspath(filepath).encode('utf-8')) % stripes
+
+
+@contextmanager
+def lock_notes(filepaths, locks_dir=LOCKS_DIR, stripes=LOCK_STRIPES):
+    """
+    Hold the exclusive locks of a set of note paths.
+
+    The stripes are acquired in ascending order and released in reverse order. Locks are not
+    reentrant: do not lock a note again while already holding its lock.
+
+    Args:
+        filepaths (iterable of str): The paths of the notes to lock.
+        locks_dir (str): The directory holding the lock files.
+        stripes (int): The number of stripes.
+
+    Yields:
+        None
+    """
+    if not HAS_FCNTL:
+        yield
+        return
+
+    os.makedirs(locks_dir, exist_ok=True)
+    handles = []
+    try:
+        for stripe in sorted({lock_stripe(filepath, stripes) for filepath in filepaths}):
+            handle = open(os.path.join(locks_dir, f"stripe-{stripe:03d}.lock"), 'a+b')
+            handles.append(handle)
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        yield
+    finally:
+        for handle in reversed(handles):
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            finally:
+                handle.close()
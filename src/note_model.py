@@ -113,26 +113,30 @@ class NoteModel:
         """
         Return a string representation of the note.
         """
-        note_str = f"UUID: {self.identifiers.uuid}\n"
-        note_str += f"Title: {self.contents.title}\n"
-        note_str += f"ZK_UID: {self.identifiers.zk_uid}\n"
-        note_str += f"Date: {self.date}\n"
-        note_str += f"Content:\n{self.contents.content}\n"
+        # Collect the lines and join them once instead of growing a string with +=
+        parts = [
+            f"UUID: {self.identifiers.uuid}\n",
+            f"Title: {self.contents.title}\n",
+            f"ZK_UID: {self.identifiers.zk_uid}\n",
+            f"Date: {self.date}\n",
+            f"Content:\n{self.contents.content}\n",
+        ]
         if self.metadata.references:
-            note_str += f"References:\n{', '.join(self.metadata.references)}\n"
-        note_str += f"Tags: {', '.join(self.metadata.tags)}\n" if self.metadata.tags else ""
+            parts.append(f"References:\n{', '.join(self.metadata.references)}\n")
+        if self.metadata.tags:
+            parts.append(f"Tags: {', '.join(self.metadata.tags)}\n")
         if self.links.forward:
-            note_str += "Links Forward to Other Notes:\n"
-            for link in self.links.forward:
-                note_str += f"Related to: ZK_UID {link['ZK_UID']} ({link['Description']})\n"
+            parts.append("Links Forward to Other Notes:\n")
+            parts.extend(f"Related to: ZK_UID {link['ZK_UID']} ({link['Description']})\n"
+                         for link in self.links.forward)
         if self.links.backward:
-            note_str += "Linked Backward from Other Notes:\n"
-            for link in self.links.backward:
-                note_str += f"Related to: ZK_UID {link['ZK_UID']} ({link['Description']})\n"
+            parts.append("Linked Backward from Other Notes:\n")
+            parts.extend(f"Related to: ZK_UID {link['ZK_UID']} ({link['Description']})\n"
+                         for link in self.links.backward)
         if self.contents.thoughts_connections:
-            note_str += f"Thoughts/Connections:\n{self.contents.thoughts_connections}\n"
+            parts.append(f"Thoughts/Connections:\n{self.contents.thoughts_connections}\n")
 
-        return note_str
+        return "".join(parts)
 
     def add_reference(self, reference: str):
         """
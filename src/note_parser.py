@@ -0,0 +1,149 @@
+"""
+note_parser.py
+------------
+
+This module parses the plain text note format into `NoteModel` instances.
+
+Notes are split into sections by their headers ("Title:", "ZK_UID:", ...). Hand-written variants
+of the headers, in any case and followed by ":" or "=", are recognized as well.
+
+Functions:
+- parse_note_data: Parses raw note data into a NoteModel using the section headers.
+- dict_to_note_model: Converts a dictionary of parsed note data into a NoteModel instance.
+
+Usage:
+with open(filepath, 'r', encoding='utf-8') as f:
+    note = parse_note_data(f.read())
+
+Dependencies:
+.note_model: Imports the note data classes
+re: For splitting the note data at the section headers and the tags
+datetime: For the default date of notes without one
+
+Author:
+Hector Alejandro Vargas Gutierrez
+
+License:
+[Specify the license under which the package is distributed, if applicable.]
+
+"""
+import re
+
+from datetime import datetime
+
+from .note_model import NoteModel, NoteIdentifiers, NoteLinks, NoteMetadata, NoteContent
+
+# Section headers of a note, spelled as NoteModel.__str__ writes them
+SECTION_NAMES = [
+    "UUID",
+    "Title",
+    "ZK_UID",
+    "Date",
+    "Content",
+    "References",
+    "Tags",
+    "Links Forward to Other Notes",
+    "Linked Backward from Other Notes",
+    "Thoughts/Connections"
+]
+SECTION_NAMES_BY_KEY = {name.lower(): name for name in SECTION_NAMES}
+
+# A section header at the start of a line, in any case and followed by ":" or "=" with optional
+# spaces, so hand-written variants such as "uuid = ..." and "Date : ..." are recognized too.
+# Anchoring at the line start keeps "ZK_UID" inside "Related to: ZK_UID ..." link lines from
+# being taken as a new section.
+SECTION_PATTERN = re.compile(
+    rf"^({'|'.join(re.escape(name) for name in SECTION_NAMES)})[ \t]*[:=]",
+    re.MULTILINE | re.IGNORECASE
+)
+
+# Tags are written separated by ", " and by spaces in hand-written notes, accept both
+TAG_SEPARATOR_PATTERN = re.compile(r"[,\s]+")
+
+
+def parse_note_data(note_data):
+    """
+    Parse the raw note data into a dictionary using predefined section keywords as delimiters.
+
+    Args:
+        note_data (str): The raw content of the note file.
+
+    Returns:
+        dict: A dictionary where keys are section names and values are the corresponding content.
+    """
+    # Split the note data into sections based on the section headers
+    splits = SECTION_PATTERN.split(note_data)
+
+    # Initialize a dictionary to hold the parsed note data
+    note_dict = {}
+
+    # Iterate over the splits to populate the dictionary, under the canonical section names
+    for i in range(1, len(splits), 2):
+        section_name = SECTION_NAMES_BY_KEY[splits[i].lower()]
+        content = splits[i + 1].strip()
+        note_dict[section_name] = content
+
+    # Forward and backward links are kept as raw "Related to: ZK_UID ..." lines;
+    # dict_to_note_model splits them into link dictionaries.
+
+    return dict_to_note_model(note_dict)
+
+
+def dict_to_note_model(parsed_dict):
+    """
+    Convert a dictionary of parsed note data into a NoteModel instance.
+
+    Args:
+        parsed_dict (dict): A dictionary containing the parsed note data.
+
+    Returns:
+        NoteModel: An instance of NoteModel populated with the data from the dictionary.
+    """
+    def parse_links(link_data):
+        """Helper function to parse links."""
+        links = []
+        for link in link_data.split("\n"):
+            if link.startswith("Related to: ZK_UID"):
+                uid_desc = link.split("ZK_UID ")[1].split(" (")
+                links.append({"ZK_UID": uid_desc[0], "Description": uid_desc[1][:-1]})
+        return links
+
+    def parse_list(data, delimiter=" "):
+        """Helper function to parse a list from a string."""
+        return data.split(delimiter) if data else []
+
+    # Extract data from the dictionary
+    title = parsed_dict.get("Title", "")
+    zk_uid = parsed_dict.get("ZK_UID", "")
+    content = parsed_dict.get("Content", "")
+    date = parsed_dict.get("Date", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    references = parse_list(parsed_dict.get("References", ""), ", ")
+    tags = [tag for tag in TAG_SEPARATOR_PATTERN.split(parsed_dict.get("Tags", "")) if tag]
+
+    forward_links = parse_links(parsed_dict.get("Links Forward to Other Notes", ""))
+    backward_links = parse_links(parsed_dict.get("Linked Backward from Other Notes", ""))
+
+    thoughts_connections = parsed_dict.get("Thoughts/Connections", "")
+
+    # Create and return the NoteModel instance
+    return NoteModel(
+        identifiers=NoteIdentifiers(
+            uuid=parsed_dict.get("UUID", ""),
+            zk_uid=zk_uid
+        ),
+        date=date,
+        metadata=NoteMetadata(
+            references=references,
+            tags=tags
+        ),
+        links=NoteLinks(
+            forward=forward_links,
+            backward=backward_links
+        ),
+        contents=NoteContent(
+            title=title,
+            content=content,
+            thoughts_connections=thoughts_connections
+        )
+    )
@@ -0,0 +1,591 @@
+"""
+query_notes.py
+------------
+
+This module runs structured queries over the notes, choosing the cheapest index first.
+
+A query is a list of predicates that must all match, for example:
+
+    tag:#Writing date:2024-08.. links-to:20240822-003 "morning routine"
+
+Predicates:
+- tag:TAG              The note has the tag (with or without the leading "#", any case).
+- date:FROM..TO        The note was created in the range. Either side may be left out, and a
+                       single value such as date:2024-08 covers the whole day, month or year.
+- links-to:ZK_UID      The note links to the note with that ZK_UID.
+- linked-from:ZK_UID   The note with that ZK_UID links to the note.
+- cite:KEY             The note cites the BibTeX key (with or without the leading "@").
+- "some words" / word  The note file contains the text (case-insensitive). A word that looks
+                       like "name:value" with an unknown name, such as 10:00 or an URL, is
+                       searched as text as well.
+
+Classes:
+- Predicate: One parsed predicate of a query.
+- Stage: One stage of a query plan, with its estimate and timing.
+- QueryIndex: Postings of every indexed field, built from the vault snapshot and persisted.
+
+Functions:
+- parse_query: Parses a query string into predicates.
+- intersect_sorted: Intersects two sorted lists of document numbers.
+- execute_query: Plans and runs a query.
+- format_plan: Formats the plan and the timing of each stage.
+- main: Command line entry point.
+
+Key Features:
+- Cost-based plan: the indexed predicates are estimated from their posting sizes and applied
+    from the most to the least selective, intersecting sorted postings.
+- Files are only read for the text predicates, and only for the remaining candidates.
+- The postings are persisted with the signature of the vault snapshot they were built from and
+    only rebuilt when a note changed; the date predicates use the persisted timeline index.
+- Explain mode showing the chosen plan with estimated and actual rows and the time per stage,
+    including the snapshot refresh and the loading or rebuilding of the postings.
+
+Usage:
+results, stages = execute_query('tag:#Writing date:2024-08.. "morning routine"')
+python -m src.query_notes --explain 'tag:#Writing date:2024-08..'
+
+Dependencies:
+. import QUERY_INDEX_PATH, SNAPSHOT_PATH, TIMELINE_PATH: Imports the global paths
+.vault_snapshot import refresh_snapshot, snapshot_is_current, snapshot_signature: Loads every
+    parsed note, or only tells whether any changed
+.timeline_index: Sorted, persisted index of the notes by creation time
+.bibtex_index import extract_citation_keys: Citation keys of a note
+argparse, bisect, dataclasses, datetime, json, os, re, sys, time, typing
+
+Author:
+Hector Alejandro Vargas Gutierrez
+
+License:
+[Specify the license under which the package is distributed, if applicable.]
+
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from . import QUERY_INDEX_PATH, SNAPSHOT_PATH, TIMELINE_PATH
+from .vault_snapshot import refresh_snapshot, snapshot_is_current, snapshot_signature
+from .timeline_index import TimelineIndex, build_timeline_index, sync_timeline, to_timeline_key
+from .bibtex_index import extract_citation_keys
+
+# A "field:value" predicate (the value may be quoted), a quoted phrase or a bare word
+TOKEN_PATTERN = re.compile(r'([\w-]+):("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+
+INDEXED_FIELDS = ("tag", "date", "links-to", "linked-from", "cite")
+
+# Version of the persisted postings; postings of another version are rebuilt
+QUERY_INDEX_VERSION = 1
+
+
+@dataclass
+class Predicate:
+    """
+    One parsed predicate of a query.
+
+    Attributes:
+        field (str): The field name, or "text" for a phrase or word.
+        value (str): The value to match.
+    """
+    field: str
+    value: str
+
+
+@dataclass
+class Stage:
+    """
+    One stage of a query plan.
+
+    Attributes:
+        predicate (Predicate): The predicate applied by the stage, or None for the stages
+                               preparing the index.
+        strategy (str): "index" for postings lookups, "scan" for reading files, "refresh" for
+                        the vault snapshot check or refresh and "cached" or "build" for the
+                        postings.
+        estimate (int): The estimated number of matching notes.
+        executed (bool): Whether the stage ran; stages after an empty result are skipped.
+        rows (int): The number of candidates left after the stage.
+        seconds (float): The time spent in the stage.
+        detail (str): What a stage without a predicate did.
+    """
+    predicate: Optional[Predicate]
+    strategy: str
+    estimate: int
+    executed: bool = False
+    rows: int = 0
+    seconds: float = 0.0
+    detail: str = ""
+
+
+def parse_query(query):
+    """
+    Parse a query string into predicates.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        list of Predicate: The predicates of the query. A "name:value" token whose name is not
+                           an indexed field is a text predicate with the whole token.
+    """
+    predicates = []
+    for match in TOKEN_PATTERN.finditer(query):
+        name, value, phrase, word = match.groups()
+        if name is not None and name.lower() in INDEXED_FIELDS:
+            predicates.append(Predicate(name.lower(), value.strip('"')))
+        elif name is not None:
+            predicates.append(Predicate("text", match.group(0)))
+        else:
+            text = phrase if phrase is not None else word
+            if text:
+                predicates.append(Predicate("text", text))
+    return predicates
+
+
+def _normalize_tag(tag):
+    """Return a tag without the leading "#", in lower case."""
+    return tag.strip().lstrip("#").lower()
+
+
+def _date_bounds(value):
+    """
+    Return the (start, end) keys of a date predicate value, end excluded.
+
+    A single date covers its whole year, month, day or second; in "FROM..TO" the TO date is
+    included with its whole period as well.
+    """
+    def period(text):
+        text = text.strip()
+        start = to_timeline_key(text)
+        if start is None:
+            raise ValueError(f"Not a date or ZK_UID: {text}")
+        moment = datetime.strptime(str(start), "%Y%m%d%H%M%S")
+        if re.fullmatch(r"\d{4}", text):
+            after = moment.replace(year=moment.year + 1)
+        elif re.fullmatch(r"\d{4}-\d{2}", text):
+            after = (moment.replace(day=28) + timedelta(days=4)).replace(day=1)
+        elif re.fullmatch(r"\d{4}-\d{2}-\d{2}", text):
+            after = moment + timedelta(days=1)
+        elif re.fullmatch(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}", text):
+            after = moment + timedelta(minutes=1)
+        else:
+            after = moment + timedelta(seconds=1)
+        return start, to_timeline_key(after)
+
+    if ".." not in value:
+        return period(value)
+    low, high = value.split("..", 1)
+    start = period(low)[0] if low.strip() else None
+    end = period(high)[1] if high.strip() else None
+    return start, end
+
+
+def intersect_sorted(first, second):
+    """
+    Intersect two sorted lists of document numbers.
+
+    When one list is much shorter, each of its entries is looked up in the longer one with
+    bisect; otherwise both lists are merged linearly.
+
+    Args:
+        first (list of int): A sorted list.
+        second (list of int): A sorted list.
+
+    Returns:
+        list of int: The sorted numbers present in both lists.
+    """
+    if len(first) > len(second):
+        first, second = second, first
+    if not first:
+        return []
+
+    if len(first) * max(1, len(second).bit_length()) < len(first) + len(second):
+        result = []
+        low = 0
+        for number in first:
+            low = bisect_left(second, number, low)
+            if low == len(second):
+                break
+            if second[low] == number:
+                result.append(number)
+        return result
+
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if first[i] < second[j]:
+            i += 1
+        elif first[i] > second[j]:
+            j += 1
+        else:
+            result.append(first[i])
+            i += 1
+            j += 1
+    return result
+
+
+def _post(postings, key, number):
+    """Add a note number to the posting set of a key."""
+    postings.setdefault(key, set()).add(number)
+
+
+def _build_postings(index, notes):
+    """Fill the tag, citation and link postings of an index whose filepaths are set."""
+    numbers_by_zk_uid = {}
+    for number, filepath in enumerate(index.filepaths):
+        zk_uid = notes[filepath].identifiers.zk_uid
+        if zk_uid:
+            numbers_by_zk_uid.setdefault(zk_uid, []).append(number)
+
+    # A forward link from A to B and a backward link in B from A are the same edge
+    for number, filepath in enumerate(index.filepaths):
+        note = notes[filepath]
+        for tag in note.metadata.tags:
+            if _normalize_tag(tag):
+                _post(index.tags, _normalize_tag(tag), number)
+        for key in extract_citation_keys(note):
+            _post(index.citations, key, number)
+        for link in note.links.forward:
+            _post(index.links_to, link['ZK_UID'], number)
+            for target in numbers_by_zk_uid.get(link['ZK_UID'], []):
+                _post(index.linked_from, note.identifiers.zk_uid, target)
+        for link in note.links.backward:
+            _post(index.linked_from, link['ZK_UID'], number)
+            for source in numbers_by_zk_uid.get(link['ZK_UID'], []):
+                _post(index.links_to, note.identifiers.zk_uid, source)
+
+    for postings in (index.tags, index.citations, index.links_to, index.linked_from):
+        for key, numbers in postings.items():
+            postings[key] = sorted(numbers)
+
+
+@dataclass
+class QueryIndex:
+    """
+    Postings of every indexed field, built from the vault snapshot.
+
+    Each posting list holds the sorted numbers of the matching notes; note number i is the
+    note stored at filepaths[i].
+
+    Attributes:
+        filepaths (list of str): The file path of every note, sorted.
+        tags (dict): Maps each normalized tag to its posting list.
+        links_to (dict): Maps each ZK_UID to the posting list of the notes linking to it.
+        linked_from (dict): Maps each ZK_UID to the posting list of the notes it links to.
+        citations (dict): Maps each citation key to its posting list.
+        timeline (TimelineIndex): The notes sorted by creation time.
+        timeline_numbers (list of int): The note number of each timeline entry.
+    """
+    filepaths: list = field(default_factory=list)
+    tags: dict = field(default_factory=dict)
+    links_to: dict = field(default_factory=dict)
+    linked_from: dict = field(default_factory=dict)
+    citations: dict = field(default_factory=dict)
+    timeline: Optional[TimelineIndex] = None
+    timeline_numbers: list = field(default_factory=list)
+
+    @classmethod
+    def build(cls, notes, timeline=None):
+        """
+        Build the postings from a set of parsed notes.
+
+        Args:
+            notes (dict): Maps each note file path to its NoteModel.
+            timeline (TimelineIndex, optional): The timeline index of the same notes. Defaults
+                                                to one built in memory.
+
+        Returns:
+            QueryIndex: The index.
+        """
+        index = cls(filepaths=sorted(notes))
+        _build_postings(index, notes)
+        index.set_timeline(timeline or build_timeline_index(notes, path=None))
+        return index
+
+    @classmethod
+    def refresh(cls, directories=None, cache_path=QUERY_INDEX_PATH, snapshot_path=SNAPSHOT_PATH,
+                timeline_path=TIMELINE_PATH):
+        """
+        Bring the index up to date with the vault.
+
+        If no note file changed since the vault snapshot was written (see snapshot_is_current),
+        the persisted postings and timeline index built from that snapshot are loaded as they
+        are, without loading the notes. Otherwise the snapshot is refreshed and the postings
+        and the timeline index are rebuilt and saved.
+
+        Args:
+            directories (list of str, optional): The directories holding the notes.
+                                                 Defaults to [NOTES_DIR_INBOX, NOTES_DIR_PERMA].
+            cache_path (str): The path of the persisted postings.
+            snapshot_path (str): The path of the vault snapshot file.
+            timeline_path (str): The path of the timeline index file.
+
+        Returns:
+            tuple: The index and the two Stages that prepared it: the snapshot check or
+                   refresh, and the loading or rebuilding of the postings.
+        """
+        start = time.perf_counter()
+        notes = None
+        if snapshot_is_current(directories, snapshot_path):
+            refresh_stage = Stage(None, "refresh", 0, detail="vault snapshot unchanged")
+        else:
+            notes = refresh_snapshot(directories, snapshot_path)
+            refresh_stage = Stage(None, "refresh", 0, detail="vault snapshot refreshed")
+        refresh_stage.seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        signature = snapshot_signature(snapshot_path)
+        index = cls.load(cache_path, signature, timeline_path) if notes is None else None
+        if index is None:
+            if notes is None:
+                notes = refresh_snapshot(directories, snapshot_path)
+            index = cls.build(notes, sync_timeline(notes, signature, timeline_path))
+            index.save(cache_path, signature)
+            postings_stage = Stage(None, "build", 0, detail="postings rebuilt")
+        else:
+            postings_stage = Stage(None, "cached", 0, detail="postings loaded")
+        postings_stage.seconds = time.perf_counter() - start
+
+        for stage in (refresh_stage, postings_stage):
+            stage.executed = True
+            stage.estimate = stage.rows = len(index.filepaths)
+        return index, [refresh_stage, postings_stage]
+
+    @classmethod
+    def load(cls, cache_path, signature, timeline_path=TIMELINE_PATH):
+        """
+        Load the persisted postings and timeline index, if they were built from a snapshot.
+
+        Args:
+            cache_path (str): The path of the persisted postings.
+            signature (tuple of int): The signature of the snapshot, see snapshot_signature.
+            timeline_path (str): The path of the timeline index file.
+
+        Returns:
+            QueryIndex: The index, or None if the postings or the timeline index are missing,
+                        were built from another snapshot or are unreadable.
+        """
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            timeline = TimelineIndex.load(timeline_path)
+        except (OSError, ValueError):
+            return None
+        expected = list(signature) if signature else None
+        if data.get('version') != QUERY_INDEX_VERSION or data.get('signature') != expected:
+            return None
+        if timeline.source_signature != signature:
+            return None
+
+        index = cls(filepaths=data['filepaths'], tags=data['tags'], links_to=data['links_to'],
+                    linked_from=data['linked_from'], citations=data['citations'])
+        index.set_timeline(timeline)
+        return index
+
+    def save(self, cache_path, signature):
+        """
+        Persist the postings, through a temporary file renamed over the old one.
+
+        Args:
+            cache_path (str): The path of the persisted postings.
+            signature (tuple of int): The signature of the snapshot the postings were built from.
+
+        Returns:
+            None
+        """
+        data = {'version': QUERY_INDEX_VERSION,
+                'signature': list(signature) if signature else None,
+                'filepaths': self.filepaths, 'tags': self.tags, 'links_to': self.links_to,
+                'linked_from': self.linked_from, 'citations': self.citations}
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, cache_path)
+
+    def set_timeline(self, timeline):
+        """
+        Attach the timeline index of the notes and map its entries to note numbers.
+
+        Args:
+            timeline (TimelineIndex): The timeline index of the same notes.
+        """
+        numbers = {filepath: number for number, filepath in enumerate(self.filepaths)}
+        self.timeline = timeline
+        self.timeline_numbers = [numbers.get(filepath, -1) for filepath in timeline.filepaths]
+
+    def _date_range(self, value):
+        """Return the timeline positions (low, high) of a date predicate value."""
+        start, end = _date_bounds(value)
+        keys = self.timeline.keys if self.timeline is not None else []
+        low = 0 if start is None else bisect_left(keys, start)
+        high = len(keys) if end is None else bisect_left(keys, end)
+        return low, max(low, high)
+
+    def estimate(self, predicate):
+        """
+        Estimate the number of notes matching an indexed predicate.
+
+        Args:
+            predicate (Predicate): An indexed predicate.
+
+        Returns:
+            int: The exact size of its posting list.
+        """
+        if predicate.field == "date":
+            low, high = self._date_range(predicate.value)
+            return high - low
+        return len(self.postings(predicate))
+
+    def postings(self, predicate):
+        """
+        Return the sorted note numbers matching an indexed predicate.
+
+        Args:
+            predicate (Predicate): An indexed predicate.
+
+        Returns:
+            list of int: The posting list.
+        """
+        if predicate.field == "date":
+            low, high = self._date_range(predicate.value)
+            # Entries added to the timeline after the postings were built have no number
+            return sorted(number for number in self.timeline_numbers[low:high] if number >= 0)
+        if predicate.field == "tag":
+            return self.tags.get(_normalize_tag(predicate.value), [])
+        if predicate.field == "cite":
+            return self.citations.get(predicate.value.lstrip("@"), [])
+        if predicate.field == "links-to":
+            return self.links_to.get(predicate.value, [])
+        return self.linked_from.get(predicate.value, [])
+
+
+def _file_contains(filepath, text):
+    """Return whether the note file contains the text, ignoring case."""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return text.casefold() in f.read().casefold()
+    except OSError:
+        return False
+
+
+def execute_query(query, index=None):
+    """
+    Plan and run a query.
+
+    The indexed predicates are estimated and applied from the smallest posting list to the
+    largest, intersecting the sorted postings; once the candidates are narrowed down, the text
+    predicates are checked by reading the remaining files.
+
+    Args:
+        query (str): The query, see the module docstring.
+        index (QueryIndex, optional): The index to use. Defaults to the index of the vault,
+                                      brought up to date with QueryIndex.refresh.
+
+    Returns:
+        tuple: The list of matching note file paths and the list of Stages, starting with the
+               stages that prepared the index when it was not given.
+
+    Raises:
+        ValueError: If a date predicate is not a date or ZK_UID.
+    """
+    predicates = parse_query(query)
+    preparation = []
+    if index is None:
+        index, preparation = QueryIndex.refresh()
+
+    # Plan: every indexed predicate first, most selective first, then the file scans
+    stages = []
+    for predicate in predicates:
+        if predicate.field == "text":
+            stages.append(Stage(predicate, "scan", len(index.filepaths)))
+        else:
+            stages.append(Stage(predicate, "index", index.estimate(predicate)))
+    stages.sort(key=lambda stage: (stage.strategy == "scan", stage.estimate))
+
+    candidates = None
+    for stage in stages:
+        start = time.perf_counter()
+        if stage.strategy == "index":
+            postings = index.postings(stage.predicate)
+            if candidates is None:
+                candidates = postings
+            else:
+                candidates = intersect_sorted(candidates, postings)
+        else:
+            if candidates is None:
+                candidates = range(len(index.filepaths))
+            candidates = [number for number in candidates
+                          if _file_contains(index.filepaths[number], stage.predicate.value)]
+        stage.executed = True
+        stage.rows = len(candidates)
+        stage.seconds = time.perf_counter() - start
+
+        # An empty candidate set cannot grow again, skip the remaining stages
+        if not candidates:
+            break
+
+    if candidates is None:
+        candidates = range(len(index.filepaths))
+    return [index.filepaths[number] for number in candidates], preparation + stages
+
+
+def format_plan(stages):
+    """
+    Format the plan and the timing of each stage.
+
+    Args:
+        stages (list of Stage): The stages returned by execute_query.
+
+    Returns:
+        str: One line per stage with its strategy, estimated rows, actual rows and time.
+    """
+    lines = [f"{'#':<3}{'strategy':<10}{'predicate':<40}{'estimate':>10}{'rows':>10}{'ms':>10}"]
+    for number, stage in enumerate(stages, 1):
+        if stage.predicate is None:
+            predicate = stage.detail
+        else:
+            predicate = f"{stage.predicate.field}:{stage.predicate.value}"
+        if stage.executed:
+            rows, milliseconds = str(stage.rows), f"{stage.seconds * 1000:.2f}"
+        else:
+            rows, milliseconds = "-", "skipped"
+        lines.append(f"{number:<3}{stage.strategy:<10}{predicate[:39]:<40}{stage.estimate:>10}"
+                     f"{rows:>10}{milliseconds:>10}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Returns:
+        int: 0 once the results were printed, 1 if the query is invalid.
+    """
+    parser = argparse.ArgumentParser(description="Query the notes of the Zettelkasten.")
+    parser.add_argument('query', help="The query, e.g. 'tag:#Writing date:2024-08..'.")
+    parser.add_argument('--explain', action='store_true',
+                        help="Print the chosen plan and the timing of each stage.")
+    args = parser.parse_args(argv)
+
+    try:
+        results, stages = execute_query(args.query)
+    except ValueError as error:
+        print(f"Invalid query: {error}")
+        return 1
+    if args.explain:
+        print(format_plan(stages))
+    print(f"Found {len(results)} notes:")
+    for result in results:
+        print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
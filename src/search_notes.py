@@ -5,10 +5,17 @@ search_notes.py
 This package searches for all notes on inbox or permanent_notes directories.
 
 Functions:
-- search_notes: [Brief description of module1]
+- is_literal: Tells whether a keyword has no regular expression syntax.
+- search_notes_batch: Searches a batch of keywords in one pass over the notes.
+- search_notes: Searches the notes for one keyword.
 
 Key Features:
 - searches for all notes on the system.
+- Literal keywords are matched as case-folded substrings, without the regex engine.
+- All the keywords of a batch are matched while each file is read once.
+- Real regular expressions are compiled once and run in a worker process with a time budget
+    per pattern and file and a size limit, so a pathological pattern cannot block the scan
+    or the other patterns; the files and patterns that were skipped are reported.
 
 Usage:
 called in main.
@@ -16,6 +23,8 @@ called in main.
 Dependencies:
 os: Imports the os module to handle file and directory operations
 re: Imports the re module to perform regular expression operations
+multiprocessing: Runs the regular expressions in a worker process that can be stopped
+dataclasses: Imports dataclass and field for the search result
 
 Author:
 Hector Alejandro Vargas Gutierrez
@@ -26,15 +35,234 @@ License:
 """
 import os
 import re
+import multiprocessing
+from dataclasses import dataclass, field
+
+# Characters that give a keyword a regular expression meaning
+REGEX_SYNTAX = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+# Default time budget, in seconds, of the regular expressions on one file
+REGEX_TIME_BUDGET = 1.0
+
+# Files larger than this many bytes are not searched with regular expressions
+REGEX_SIZE_BUDGET = 10 * 1024 * 1024
+
+
+@dataclass
+class SearchResult:
+    """
+    Result of a batch search.
+
+    Attributes:
+        matches (dict): Maps each keyword to the list of filenames of the notes containing it.
+        skipped (list of tuple): The (filename, reason) of every file, or regular expression on
+                                 a file, that was not searched to completion.
+    """
+    matches: dict = field(default_factory=dict)
+    skipped: list = field(default_factory=list)
+
+
+def is_literal(keyword):
+    """
+    Tell whether a keyword has no regular expression syntax.
+
+    Args:
+        keyword (str): The keyword.
+
+    Returns:
+        bool: True if the keyword means the same as a plain substring.
+    """
+    return REGEX_SYNTAX.search(keyword) is None
+
+
+def _is_pattern(keyword):
+    """Tell whether a keyword is a valid regular expression with regex syntax."""
+    if is_literal(keyword):
+        return False
+    try:
+        re.compile(keyword, re.IGNORECASE)
+    except re.error:
+        # Such as "(draft" or "*note": searched for as typed
+        return False
+    return True
+
+
+def _regex_worker(connection, patterns):
+    """
+    Run the regular expressions on the contents sent through the connection.
+
+    Receives (content, first) pairs and answers once per pattern, from the pattern numbered
+    `first` to the last, whether it was found in the content, until it receives None.
+    """
+    compiled = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        content, first = message
+        for regex in compiled[first:]:
+            connection.send(regex.search(content) is not None)
+
+
+class _RegexRunner:
+    """Worker process running the regular expressions, restarted when a pattern runs too long."""
+
+    def __init__(self, patterns, time_budget):
+        self.patterns = patterns
+        self.time_budget = time_budget
+        self.process = None
+        self.connection = None
+
+    def _start(self):
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_regex_worker,
+                                               args=(worker_connection, self.patterns),
+                                               daemon=True)
+        self.process.start()
+        worker_connection.close()
+
+    def _stop(self):
+        """Terminate the worker, a new one is started for the next pattern."""
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+        self.process = None
+
+    def search(self, content):
+        """
+        Run every pattern on the content of one file, each with its own time budget.
+
+        A pattern that runs past the budget is abandoned and the remaining patterns are run
+        in a new worker.
+
+        Returns:
+            list of tuple: One (found, reason) pair per pattern; `found` is None when the
+                           pattern was not run to completion and `reason` tells why.
+        """
+        results = []
+        while len(results) < len(self.patterns):
+            if self.process is None:
+                self._start()
+            self.connection.send((content, len(results)))
+            while len(results) < len(self.patterns):
+                if not self.connection.poll(self.time_budget):
+                    # Still backtracking
+                    self._stop()
+                    results.append((None, f"took longer than {self.time_budget} s"))
+                    break
+                try:
+                    results.append((self.connection.recv(), None))
+                except EOFError:
+                    # The worker died, e.g. out of memory
+                    self._stop()
+                    results.append((None, "could not be run"))
+                    break
+        return results
+
+    def close(self):
+        """Stop the worker process."""
+        if self.process is not None:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+            self.connection.close()
+            self.process = None
+
+
+def _search_file(filepath, literals, runner, size_budget):
+    """
+    Search one file for the keywords of a batch, reading it once.
+
+    Returns:
+        tuple: The list of keywords found and the list of reasons why some of them could not
+               be searched for.
+    """
+    found = []
+    reasons = []
+    too_large = runner is not None and os.path.getsize(filepath) > size_budget
+    if too_large:
+        reasons.append(f"larger than {size_budget} bytes")
+        if not literals:
+            return found, reasons
+
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except UnicodeDecodeError:
+        reasons.append("not valid UTF-8")
+        return found, reasons
+
+    if literals:
+        folded = content.casefold()
+        found.extend(keyword for keyword, casefolded in literals if casefolded in folded)
+    if runner is not None and not too_large:
+        for pattern, (matched, reason) in zip(runner.patterns, runner.search(content)):
+            if matched:
+                found.append(pattern)
+            elif reason is not None:
+                reasons.append(f"regex {pattern!r} {reason}")
+    return found, reasons
+
+
+def search_notes_batch(keywords, address, time_budget=REGEX_TIME_BUDGET,
+                       size_budget=REGEX_SIZE_BUDGET):
+    """
+    Searches for notes containing any of a batch of keywords, reading each file once.
+
+    Literal keywords, and keywords with regular expression syntax that are not valid regular
+    expressions such as "(draft", are matched as case-folded substrings of the case-folded file
+    content. The other keywords with regular expression syntax are compiled once and run,
+    case-insensitively, in a worker process that receives the content already read; a file is
+    skipped for them if it is larger than `size_budget`, and a pattern is skipped on a file if
+    it takes longer than `time_budget` on it, without affecting the other patterns.
+
+    Parameters:
+        keywords (list of str): The keywords to search for.
+        address (str): The notes directory (`NOTES_DIR_INBOX`, `NOTES_DIR_PERMA`).
+        time_budget (float): The time, in seconds, each regular expression may take on one
+                             file.
+        size_budget (int): The size, in bytes, above which files are not searched with regular
+                           expressions.
+
+    Returns:
+        SearchResult: The filenames matching each keyword and the skipped files.
+    """
+    result = SearchResult(matches={keyword: [] for keyword in keywords})
+    patterns = [keyword for keyword in keywords if _is_pattern(keyword)]
+    literals = [(keyword, keyword.casefold()) for keyword in keywords if keyword not in patterns]
+    runner = _RegexRunner(patterns, time_budget) if patterns else None
+
+    try:
+        for filename in os.listdir(address):
+            if not filename.endswith(".txt"):  # Check if the file is a text file
+                continue
+            found, reasons = _search_file(os.path.join(address, filename), literals, runner,
+                                          size_budget)
+            for keyword in found:
+                result.matches[keyword].append(filename)
+            result.skipped.extend((filename, reason) for reason in reasons)
+    finally:
+        if runner is not None:
+            runner.close()
+
+    return result
+
 
 def search_notes(keyword, address):
     """
     Searches for notes that contain a specific keyword in their content.
 
-    This function iterates through all note files in the 
+    This function iterates through all note files in the
     address(`NOTES_DIR_INBOX`,`NOTES_DIR_PERMA`) directory, reads the content
-    of each file, and checks if the specified keyword is present. It performs a case-insensitive 
-    search and collects filenames of notes that contain the keyword.
+    of each file, and checks if the specified keyword is present. It performs a case-insensitive
+    search and collects filenames of notes that contain the keyword. Plain keywords are matched
+    as substrings; keywords with regular expression syntax are run with the time and size
+    budgets of `search_notes_batch`, and the files skipped because of them are printed.
 
     Parameters:
         keyword (str): The keyword to search for in the note files.
@@ -42,17 +270,7 @@ def search_notes(keyword, address):
     Returns:
         list of str: A list of filenames (strings) of notes that contain the keyword.
     """
-    notes = []# Initialize an empty list to store filenames of notes containing the keyword
-
-    # Iterate over each file in the notes directory
-    for filename in os.listdir(address):
-        if filename.endswith(".txt"):  # Check if the file is a text file
-            # Construct the full file path and open the file in read mode
-            with open(os.path.join(address, filename), 'r', encoding='utf-8') as f:
-                content = f.read()# Read the entire content of the file
-
-                # Search for the keyword in the file content, ignoring case
-                if re.search(keyword, content, re.IGNORECASE):
-                    notes.append(filename)# Add the filename to the list if the keyword is found
-
-    return notes  # Return the list of filenames containing the keyword
+    result = search_notes_batch([keyword], address)
+    for filename, reason in result.skipped:
+        print(f"Skipped {filename}: {reason}.")
+    return result.matches[keyword]  # Return the list of filenames containing the keyword
@@ -0,0 +1,406 @@
+"""
+serializers.py
+------------
+
+This module provides interchangeable serializers that turn a NoteModel into text, JSON or a
+compact binary record and back.
+
+Classes:
+- NoteSerializer: The interface shared by every serializer.
+- TextSerializer: Writes the plain text note format used in the notes directories.
+- JsonSerializer: Writes a note as a JSON object.
+- BinarySerializer: Writes a note as a compact length-prefixed binary record.
+
+Functions:
+- note_to_strings: Flattens a note into a list of strings and list lengths.
+- strings_to_note: Rebuilds a note from the strings produced by note_to_strings.
+- write_note: Writes a note to a file atomically with a serializer.
+- benchmark_serializers: Measures the serialize/deserialize throughput of each serializer.
+
+Key Features:
+- The text serializer produces exactly the format of `NoteModel.__str__`, built with one join.
+- The JSON and binary serializers round-trip every field of a note, including None values.
+
+Usage:
+write_note(filepath, note)
+data = BinarySerializer().serialize(note)
+note = BinarySerializer().deserialize(data)
+
+Run `python -m src.serializers` to print the benchmark table.
+
+Dependencies:
+.note_model: Imports the note data classes
+.note_parser import parse_note_data: Parses the text note format
+abc, json, os, struct, sys, threading, time, array
+
+Author:
+Hector Alejandro Vargas Gutierrez
+
+License:
+[Specify the license under which the package is distributed, if applicable.]
+
+"""
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+
+from .note_model import NoteModel, NoteIdentifiers, NoteLinks, NoteMetadata, NoteContent
+from .note_parser import parse_note_data
+
+# Number of scalar string fields stored per note by note_to_strings
+NOTE_SCALAR_FIELDS = 6
+
+
+def note_to_strings(note):
+    """
+    Flatten a note into a list of strings.
+
+    The list holds the uuid, ZK_UID, date, title, content and thoughts/connections, followed by
+    the references, the tags and the (ZK_UID, Description) pairs of the forward and backward
+    links. None values are stored as empty strings.
+
+    Args:
+        note (NoteModel): The note to flatten.
+
+    Returns:
+        tuple: The list of strings and the number of references, tags, forward links and
+               backward links it contains.
+    """
+    strings = [
+        note.identifiers.uuid or "",
+        note.identifiers.zk_uid or "",
+        note.date or "",
+        note.contents.title,
+        note.contents.content,
+        note.contents.thoughts_connections or "",
+    ]
+    strings.extend(note.metadata.references)
+    strings.extend(note.metadata.tags)
+    for link in note.links.forward:
+        strings.append(link['ZK_UID'])
+        strings.append(link['Description'])
+    for link in note.links.backward:
+        strings.append(link['ZK_UID'])
+        strings.append(link['Description'])
+
+    counts = (
+        len(note.metadata.references),
+        len(note.metadata.tags),
+        len(note.links.forward),
+        len(note.links.backward),
+    )
+    return strings, counts
+
+
+def strings_to_note(values, position, counts):
+    """
+    Rebuild a note from the strings produced by note_to_strings.
+
+    Args:
+        values (list of str): The strings of one or more flattened notes.
+        position (int): The index of the first string of the note in `values`.
+        counts (sequence of int): The number of references, tags, forward links and backward
+                                  links of the note.
+
+    Returns:
+        tuple: The NoteModel and the index just past its last string.
+    """
+    uuid, zk_uid, date, title, content, thoughts = values[position:position + NOTE_SCALAR_FIELDS]
+    position += NOTE_SCALAR_FIELDS
+
+    references = values[position:position + counts[0]]
+    position += counts[0]
+    tags = values[position:position + counts[1]]
+    position += counts[1]
+    # (ZK_UID, Description) pairs of the forward and backward links
+    forward = values[position:position + 2 * counts[2]]
+    position += 2 * counts[2]
+    backward = values[position:position + 2 * counts[3]]
+    position += 2 * counts[3]
+
+    return NoteModel(
+        identifiers=NoteIdentifiers(uuid=uuid, zk_uid=zk_uid),
+        date=date,
+        metadata=NoteMetadata(references=references, tags=tags),
+        links=NoteLinks(
+            forward=[{'ZK_UID': uid, 'Description': description}
+                     for uid, description in zip(forward[::2], forward[1::2])],
+            backward=[{'ZK_UID': uid, 'Description': description}
+                      for uid, description in zip(backward[::2], backward[1::2])]
+        ),
+        contents=NoteContent(
+            title=title,
+            content=content,
+            thoughts_connections=thoughts
+        )
+    ), position
+
+
+class NoteSerializer(ABC):
+    """
+    Interface shared by every note serializer.
+
+    Attributes:
+        name (str): A short name of the format.
+        binary (bool): Whether the serialized form is bytes rather than str.
+    """
+    name = ""
+    binary = False
+
+    @abstractmethod
+    def serialize(self, note):
+        """
+        Serialize a note.
+
+        Args:
+            note (NoteModel): The note to serialize.
+
+        Returns:
+            str or bytes: The serialized note.
+        """
+
+    @abstractmethod
+    def deserialize(self, data):
+        """
+        Deserialize a note.
+
+        Args:
+            data (str or bytes): A note produced by `serialize`.
+
+        Returns:
+            NoteModel: The deserialized note.
+        """
+
+    def write(self, note, stream):
+        """
+        Write a serialized note to an open file.
+
+        Args:
+            note (NoteModel): The note to write.
+            stream (file object): A file opened in text mode, or binary mode if `binary` is set.
+        """
+        stream.write(self.serialize(note))
+
+
+class TextSerializer(NoteSerializer):
+    """
+    Serializer for the plain text note format stored in the notes directories.
+
+    The output is identical to `NoteModel.__str__`. Deserialization goes through
+    `parse_note_data`, so it only recovers what that parser understands.
+    """
+    name = "text"
+
+    def serialize(self, note):
+        return str(note)
+
+    def deserialize(self, data):
+        return parse_note_data(data)
+
+
+class JsonSerializer(NoteSerializer):
+    """
+    Serializer for a JSON object mirroring the NoteModel data classes.
+    """
+    name = "json"
+
+    def serialize(self, note):
+        # Built by hand, dataclasses.asdict deep-copies every field and is several times slower
+        return json.dumps({
+            'identifiers': {'uuid': note.identifiers.uuid, 'zk_uid': note.identifiers.zk_uid},
+            'date': note.date,
+            'metadata': {'references': note.metadata.references, 'tags': note.metadata.tags},
+            'links': {'forward': note.links.forward, 'backward': note.links.backward},
+            'contents': {
+                'title': note.contents.title,
+                'content': note.contents.content,
+                'thoughts_connections': note.contents.thoughts_connections
+            }
+        }, ensure_ascii=False)
+
+    def deserialize(self, data):
+        note_dict = json.loads(data)
+        return NoteModel(
+            identifiers=NoteIdentifiers(**note_dict['identifiers']),
+            date=note_dict['date'],
+            metadata=NoteMetadata(**note_dict['metadata']),
+            links=NoteLinks(**note_dict['links']),
+            contents=NoteContent(**note_dict['contents'])
+        )
+
+
+class BinarySerializer(NoteSerializer):
+    """
+    Serializer for a compact binary record.
+
+    The record starts with a header holding a magic number, a bit mask of the fields that are
+    None and the number of references, tags, forward links and backward links. It is followed
+    by the UTF-8 byte length of every string of `note_to_strings` and then by the strings.
+    """
+    name = "binary"
+    binary = True
+
+    MAGIC = b"ZKN1"
+    HEADER = struct.Struct("<4sBIIII")
+
+    # Bits of the None mask, in the order of the fields that may be None
+    NONE_FIELDS = ("uuid", "zk_uid", "date", "thoughts_connections")
+
+    def serialize(self, note):
+        strings, counts = note_to_strings(note)
+        values = (note.identifiers.uuid, note.identifiers.zk_uid, note.date,
+                  note.contents.thoughts_connections)
+        none_mask = 0
+        for bit, value in enumerate(values):
+            if value is None:
+                none_mask |= 1 << bit
+
+        encoded = [value.encode('utf-8', 'surrogatepass') for value in strings]
+        lengths = array('I', map(len, encoded))
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+
+        return b"".join([
+            self.HEADER.pack(self.MAGIC, none_mask, *counts),
+            lengths.tobytes(),
+            *encoded
+        ])
+
+    def deserialize(self, data):
+        magic, none_mask, *counts = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC:
+            raise ValueError("Data is not a binary note record.")
+
+        string_count = NOTE_SCALAR_FIELDS + counts[0] + counts[1] + 2 * (counts[2] + counts[3])
+        start = self.HEADER.size
+        lengths = array('I')
+        lengths.frombytes(data[start:start + lengths.itemsize * string_count])
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+        start += lengths.itemsize * string_count
+
+        values = []
+        for length in lengths:
+            values.append(data[start:start + length].decode('utf-8', 'surrogatepass'))
+            start += length
+
+        note, _ = strings_to_note(values, 0, counts)
+        if none_mask & 1:
+            note.identifiers.uuid = None
+        if none_mask & 2:
+            note.identifiers.zk_uid = None
+        if none_mask & 4:
+            note.date = None
+        if none_mask & 8:
+            note.contents.thoughts_connections = None
+        return note
+
+
+SERIALIZERS = {
+    serializer.name: serializer
+    for serializer in (TextSerializer(), JsonSerializer(), BinarySerializer())
+}
+
+
+def write_note(filepath, note, serializer=None):
+    """
+    Write a note to a file atomically.
+
+    The note is written and flushed to a temporary file next to the target, which is then
+    renamed over it, so readers see either the old or the new note and never a partial one.
+
+    Args:
+        filepath (str): The path of the file to write.
+        note (NoteModel): The note to write.
+        serializer (NoteSerializer, optional): The serializer to use. Defaults to the text format.
+
+    Returns:
+        None
+    """
+    if serializer is None:
+        serializer = SERIALIZERS["text"]
+
+    # Unique per writer, and not ending in ".txt" so it is never listed as a note
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if serializer.binary:
+            f = open(tmp_path, 'xb')
+        else:
+            f = open(tmp_path, 'x', encoding='utf-8')
+        with f:
+            serializer.write(note, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _sample_note(size):
+    """Build a note whose content, tags and links grow with `size`."""
+    return NoteModel(
+        identifiers=NoteIdentifiers(uuid="e2f9c93b-9f8b-4e0a-93a8-77de7453348b",
+                                    zk_uid="20240823-100000"),
+        date="2024-08-23 10:00:00",
+        metadata=NoteMetadata(
+            references=[f"@source{i}" for i in range(size)],
+            tags=[f"#Tag{i}" for i in range(size)]
+        ),
+        links=NoteLinks(
+            forward=[{'ZK_UID': f"20240822-{i:06d}", 'Description': f"Forward note {i}"}
+                     for i in range(size)],
+            backward=[{'ZK_UID': f"20240821-{i:06d}", 'Description': f"Backward note {i}"}
+                      for i in range(size)]
+        ),
+        contents=NoteContent(
+            title=f"Sample note of size {size}",
+            content="Daily writing practice enhances cognitive function. " * (20 * size),
+            thoughts_connections="Consider incorporating this into morning routines. " * size
+        )
+    )
+
+
+def benchmark_serializers(sizes=(1, 10, 100), rounds=1000):
+    """
+    Measure the serialize and deserialize throughput of every serializer.
+
+    Args:
+        sizes (tuple of int): The sizes of the sample notes. A note of size n has n references,
+                              tags, forward and backward links and about 1 KB of content per n.
+        rounds (int): How many times each note is serialized and deserialized.
+
+    Returns:
+        list of tuple: One (format, size, serialized bytes, serialize notes/s,
+                       deserialize notes/s) row per serializer and size.
+    """
+    results = []
+    for size in sizes:
+        note = _sample_note(size)
+        for name, serializer in SERIALIZERS.items():
+            start = time.perf_counter()
+            for _ in range(rounds):
+                data = serializer.serialize(note)
+            serialize_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                serializer.deserialize(data)
+            deserialize_time = time.perf_counter() - start
+
+            encoded_size = len(data) if serializer.binary else len(data.encode('utf-8'))
+            results.append((name, size, encoded_size,
+                            rounds / serialize_time, rounds / deserialize_time))
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'format':<8}{'size':>6}{'bytes':>10}{'ser/s':>12}{'deser/s':>12}")
+    for row in benchmark_serializers():
+        print(f"{row[0]:<8}{row[1]:>6}{row[2]:>10}{row[3]:>12.0f}{row[4]:>12.0f}")
@@ -0,0 +1,444 @@
+"""
+timeline_index.py
+------------
+
+This module keeps a sorted, persisted index of the notes by creation time for timeline queries.
+
+ZK_UIDs and the Date field are both timestamps. Every note is indexed under its creation time,
+taken from its ZK_UID (UID_FORMAT) or, when the ZK_UID is not a timestamp, from its Date field.
+Times are stored as YYYYMMDDhhmmss integers in a sorted array, so range queries, the most
+recent notes and per-day or per-month histograms are answered with bisect.
+
+Classes:
+- TimelineIndex: The sorted index of notes by creation time.
+
+Functions:
+- to_timeline_key: Converts a datetime, ZK_UID or date string into an index key.
+- note_timeline_key: Returns the index key of a note.
+- build_timeline_index: Builds the index from a set of parsed notes.
+- sync_timeline: Returns the persisted index, rebuilt if it does not match a vault snapshot.
+- refresh_timeline: Brings the persisted index up to date with the note directories.
+- add_note_to_timeline: Adds a newly written note to the persisted index.
+
+Key Features:
+- Range queries and top-N recent notes in O(log n + k).
+- Histograms in O(log n) per non-empty day or month.
+- create_note adds its notes to the index as they are written. Notes added, edited or deleted
+    by any other means (importers, sync jobs, hand edits) are picked up by refresh_timeline:
+    the index records the signature of the vault snapshot it was built from and is rebuilt
+    when the snapshot changed.
+
+Usage:
+index = refresh_timeline()
+index.range("2024-08-01", "2024-09-01")
+index.recent(50)
+index.histogram(by="month")
+
+Dependencies:
+. import TIMELINE_PATH: Imports the index path from __init__.py
+.vault_snapshot import refresh_snapshot, snapshot_is_current, snapshot_signature: Loads all
+    notes, or only tells whether they changed since the index was built
+.note_locks import lock_notes: Locks the index while it is updated
+array, bisect, datetime, os, re, struct, sys
+
+Author:
+Hector Alejandro Vargas Gutierrez
+
+License:
+[Specify the license under which the package is distributed, if applicable.]
+
+"""
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from . import TIMELINE_PATH
+from . import SNAPSHOT_PATH
+from .vault_snapshot import refresh_snapshot, snapshot_is_current, snapshot_signature
+from .note_locks import lock_notes
+
+# File header: magic bytes, format version, number of entries and the (mtime_ns, size)
+# signature of the vault snapshot the index was built from, -1 when unknown
+TIMELINE_MAGIC = b"ZKTL"
+TIMELINE_VERSION = 3
+HEADER = struct.Struct("<4sHIqq")
+
+# Date formats tried when a string is not zero-padded, most specific first. ZK_UIDs are only
+# accepted as the full "YYYYMMDD-hhmmss" of KEY_PATTERN: strptime with UID_FORMAT would read a
+# sequence-numbered ZK_UID such as "20240822-003" as 00:00:03
+KEY_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y-%m", "%Y")
+
+# Zero-padded "YYYYMMDD-hhmmss" ZK_UIDs and "YYYY[-MM[-DD[ hh:mm[:ss]]]]" dates
+KEY_PATTERN = re.compile(
+    r"(\d{4})(\d{2})(\d{2})-(\d{2})(\d{2})(\d{2})"
+    r"|(\d{4})(?:-(\d{2})(?:-(\d{2})(?: (\d{2}):(\d{2})(?::(\d{2}))?)?)?)?"
+)
+
+# Divisors turning a YYYYMMDDhhmmss key into its day (YYYYMMDD) or month (YYYYMM)
+BUCKET_DIVISORS = {'day': 10 ** 6, 'month': 10 ** 8}
+
+
+def to_timeline_key(value):
+    """
+    Convert a datetime, ZK_UID or date string into an index key.
+
+    Args:
+        value (datetime or str): A datetime, a full ZK_UID in UID_FORMAT or a date such as
+                                 "2024-08-23 10:00:00", "2024-08-23", "2024-08" or "2024".
+
+    Returns:
+        int: The YYYYMMDDhhmmss key, or None if the value is not a timestamp.
+    """
+    if isinstance(value, str):
+        text = value.strip().lstrip(":").strip()
+
+        # Fast path for the zero-padded forms, strptime is slow when tried format by format
+        match = KEY_PATTERN.fullmatch(text)
+        if match:
+            parts = [int(part) for part in match.groups() if part is not None]
+            # A missing month or day is the first one, as with strptime
+            parts += [1] * (3 - len(parts))
+            try:
+                value = datetime(*parts)
+            except ValueError:
+                return None
+            return int(value.strftime("%Y%m%d%H%M%S"))
+
+        for key_format in KEY_FORMATS:
+            try:
+                value = datetime.strptime(text, key_format)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return int(value.strftime("%Y%m%d%H%M%S"))
+
+
+def note_timeline_key(note):
+    """
+    Return the index key of a note, from its ZK_UID or else from its Date field.
+
+    Args:
+        note (NoteModel): The note.
+
+    Returns:
+        int: The YYYYMMDDhhmmss key, or None if neither field is a timestamp.
+    """
+    for value in (note.identifiers.zk_uid, note.date):
+        if value:
+            key = to_timeline_key(value)
+            if key is not None:
+                return key
+    return None
+
+
+class TimelineIndex:
+    """
+    The sorted index of notes by creation time.
+
+    Attributes:
+        path (str): The path the index is saved to.
+        keys (array of int): The sorted YYYYMMDDhhmmss keys.
+        zk_uids (list of str): The ZK_UID of the note of each key.
+        filepaths (list of str): The file path of the note of each key.
+        source_signature (tuple of int): The signature of the vault snapshot the index was built
+                                         from (see snapshot_signature), or None if unknown.
+    """
+
+    def __init__(self, path=TIMELINE_PATH):
+        self.path = path
+        self.keys = array('q')
+        self.zk_uids = []
+        self.filepaths = []
+        self.source_signature = None
+
+    @classmethod
+    def load(cls, path=TIMELINE_PATH):
+        """
+        Load the index from a file.
+
+        Args:
+            path (str): The path of the index file.
+
+        Returns:
+            TimelineIndex: The loaded index, empty if the file does not exist.
+
+        Raises:
+            ValueError: If the file is not a timeline index of this format version or is
+                        truncated.
+        """
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is truncated.")
+        magic, version, count, mtime_ns, size = HEADER.unpack_from(data)
+        if magic != TIMELINE_MAGIC or version != TIMELINE_VERSION:
+            raise ValueError(f"{path} is not a version {TIMELINE_VERSION} timeline index.")
+        if size >= 0:
+            index.source_signature = (mtime_ns, size)
+
+        start = HEADER.size
+        end = start + index.keys.itemsize * count
+        if end > len(data):
+            raise ValueError(f"{path} is truncated.")
+        index.keys.frombytes(data[start:end])
+        if sys.byteorder == 'big':
+            index.keys.byteswap()
+
+        # ZK_UIDs and file paths never contain newlines, so they are stored one per line; the
+        # last line is terminated too, so a truncated file leaves no complete last line
+        if count:
+            strings = data[end:].decode('utf-8').split("\n")
+            if len(strings) != 2 * count + 1 or strings[-1]:
+                raise ValueError(f"{path} is truncated.")
+            index.zk_uids = strings[:count]
+            index.filepaths = strings[count:2 * count]
+        return index
+
+    def save(self):
+        """
+        Save the index to its file, through a temporary file renamed over the old one.
+
+        Returns:
+            None
+        """
+        keys = array('q', self.keys)
+        if sys.byteorder == 'big':
+            keys.byteswap()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(TIMELINE_MAGIC, TIMELINE_VERSION, len(self.keys),
+                                *(self.source_signature or (-1, -1))))
+            f.write(keys.tobytes())
+            lines = "".join(f"{value}\n" for value in self.zk_uids + self.filepaths)
+            f.write(lines.encode('utf-8'))
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, zk_uid, filepath):
+        """
+        Add a note to the index, replacing any previous entry for the same file.
+
+        Args:
+            key (int): The YYYYMMDDhhmmss key of the note (see to_timeline_key).
+            zk_uid (str): The ZK_UID of the note.
+            filepath (str): The file path of the note.
+        """
+        if filepath in self.filepaths:
+            position = self.filepaths.index(filepath)
+            del self.keys[position]
+            del self.zk_uids[position]
+            del self.filepaths[position]
+
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.zk_uids.insert(position, zk_uid or "")
+        self.filepaths.insert(position, filepath)
+
+    def _position(self, value, default):
+        """Return the position of the first entry with a key >= value, or default if None."""
+        if value is None:
+            return default
+        key = to_timeline_key(value)
+        if key is None:
+            raise ValueError(f"Not a date or ZK_UID: {value}")
+        return bisect_left(self.keys, key)
+
+    def _bounds(self, start, end):
+        """Return the positions of the entries with start <= key < end."""
+        low = self._position(start, 0)
+        high = self._position(end, len(self.keys))
+        return low, max(low, high)
+
+    def range(self, start=None, end=None):
+        """
+        Return the notes created from `start` (inclusive) up to `end` (exclusive).
+
+        Args:
+            start (datetime or str, optional): The start of the range, see to_timeline_key.
+            end (datetime or str, optional): The end of the range, see to_timeline_key.
+
+        Returns:
+            list of tuple: The (ZK_UID, file path) of the notes, oldest first.
+        """
+        low, high = self._bounds(start, end)
+        return list(zip(self.zk_uids[low:high], self.filepaths[low:high]))
+
+    def recent(self, count=50):
+        """
+        Return the most recently created notes.
+
+        Args:
+            count (int): How many notes to return.
+
+        Returns:
+            list of tuple: The (ZK_UID, file path) of the notes, newest first.
+        """
+        low = max(0, len(self.keys) - count)
+        return list(zip(reversed(self.zk_uids[low:]), reversed(self.filepaths[low:])))
+
+    def histogram(self, start=None, end=None, by='day'):
+        """
+        Count the notes created per day or per month.
+
+        Only non-empty buckets are returned; each one costs a single bisect.
+
+        Args:
+            start (datetime or str, optional): The start of the range, see to_timeline_key.
+            end (datetime or str, optional): The end of the range, see to_timeline_key.
+            by (str): 'day' or 'month'.
+
+        Returns:
+            list of tuple: (bucket, count) pairs in chronological order, where bucket is
+                           "YYYY-MM-DD" or "YYYY-MM".
+        """
+        if by not in BUCKET_DIVISORS:
+            raise ValueError(f"Unknown histogram bucket: {by}")
+        divisor = BUCKET_DIVISORS[by]
+
+        low, high = self._bounds(start, end)
+        buckets = []
+        while low < high:
+            bucket = self.keys[low] // divisor
+            # Every key of a later bucket is at least the first key of the next bucket value
+            next_low = bisect_left(self.keys, (bucket + 1) * divisor, low, high)
+            text = str(bucket)
+            if by == 'day':
+                label = f"{text[:4]}-{text[4:6]}-{text[6:8]}"
+            else:
+                label = f"{text[:4]}-{text[4:6]}"
+            buckets.append((label, next_low - low))
+            low = next_low
+        return buckets
+
+
+def build_timeline_index(notes, path=TIMELINE_PATH):
+    """
+    Build the index from a set of parsed notes.
+
+    Args:
+        notes (dict): Maps each note file path to its NoteModel, as returned by refresh_snapshot.
+        path (str): The path the index will be saved to.
+
+    Returns:
+        TimelineIndex: The index. Notes without a timestamp are left out.
+    """
+    entries = []
+    for filepath, note in notes.items():
+        key = note_timeline_key(note)
+        if key is not None:
+            entries.append((key, note.identifiers.zk_uid or "", filepath))
+    entries.sort()
+
+    index = TimelineIndex(path)
+    index.keys = array('q', [entry[0] for entry in entries])
+    index.zk_uids = [entry[1] for entry in entries]
+    index.filepaths = [entry[2] for entry in entries]
+    return index
+
+
+def sync_timeline(notes, signature, path=TIMELINE_PATH):
+    """
+    Return the persisted index, rebuilt and saved if it was not built from the given snapshot.
+
+    Args:
+        notes (dict): Maps each note file path to its NoteModel, as returned by refresh_snapshot.
+        signature (tuple of int): The signature of the snapshot `notes` was loaded from, see
+                                  snapshot_signature.
+        path (str): The path of the index file.
+
+    Returns:
+        TimelineIndex: The index of `notes`.
+    """
+    with lock_notes([path]):
+        try:
+            index = TimelineIndex.load(path)
+        except ValueError:
+            # Index of an older format version, or damaged
+            index = None
+        if index is None or index.source_signature != signature or not os.path.exists(path):
+            index = build_timeline_index(notes, path)
+            index.source_signature = signature
+            index.save()
+    return index
+
+
+def refresh_timeline(directories=None, path=TIMELINE_PATH, snapshot_path=SNAPSHOT_PATH):
+    """
+    Bring the persisted index up to date with the note directories.
+
+    If no note file changed since the vault snapshot was written (see snapshot_is_current) and
+    the persisted index was built from that snapshot, the index is loaded as it is, without
+    loading the notes. Otherwise the snapshot is refreshed and, if it changed since the index
+    was built, because notes were added, edited or deleted by any means, the index is rebuilt
+    from it.
+
+    Args:
+        directories (list of str, optional): The directories holding the notes.
+                                             Defaults to [NOTES_DIR_INBOX, NOTES_DIR_PERMA].
+        path (str): The path of the index file.
+        snapshot_path (str): The path of the vault snapshot file.
+
+    Returns:
+        TimelineIndex: The up to date index.
+    """
+    if snapshot_is_current(directories, snapshot_path):
+        try:
+            index = TimelineIndex.load(path)
+        except ValueError:
+            index = None
+        if index is not None and index.source_signature == snapshot_signature(snapshot_path):
+            return index
+
+    notes = refresh_snapshot(directories, snapshot_path)
+    return sync_timeline(notes, snapshot_signature(snapshot_path), path)
+
+
+def add_note_to_timeline(note, filepath, path=TIMELINE_PATH):
+    """
+    Add a newly written note to the persisted index.
+
+    If the index file does not exist yet, it is first built from all the notes of the vault.
+    The index keeps the signature of the snapshot it was built from, so the next
+    refresh_timeline still rebuilds it once the snapshot includes the new note.
+
+    Args:
+        note (NoteModel): The note.
+        filepath (str): The file path the note was written to.
+        path (str): The path of the index file.
+
+    Returns:
+        None
+    """
+    # The index is read, modified and rewritten, so concurrent writers must not interleave
+    with lock_notes([path]):
+        try:
+            index = TimelineIndex.load(path) if os.path.exists(path) else None
+        except ValueError:
+            index = None
+        if index is None:
+            index = build_timeline_index(refresh_snapshot(), path)
+
+        key = note_timeline_key(note)
+        if key is not None:
+            index.add(key, note.identifiers.zk_uid, filepath)
+        index.save()
@@ -0,0 +1,356 @@
+"""
+validate_notes.py
+------------
+
+This module validates every note of the vault and reports format problems.
+
+Notes come from several hand-written variants of the format. Each note file is checked for
+missing, empty, duplicated or non-canonical sections, invalid UUIDs and dates and malformed
+link lines; the whole vault is then checked for duplicate ZK_UIDs and for file names that do
+not start with the ZK_UID of their note.
+
+Functions:
+- check_note_file: Checks a single note file.
+- validate_notes: Checks every note of the given directories with a process pool.
+- format_issues: Formats the issues as text or JSON.
+- main: Command line entry point, usable as a pre-commit hook.
+
+Key Features:
+- Files are checked in parallel on all cores.
+- Incremental mode: the results of unchanged files (same mtime and size) are taken from a cache,
+    so only the changed files are parsed again.
+- Machine-readable JSON output and a non-zero exit status when errors are found.
+
+Usage:
+python -m src.validate_notes [--incremental] [--format json] [--jobs N] [directory ...]
+
+Dependencies:
+. import NOTES_DIR_INBOX, NOTES_DIR_PERMA, VALIDATION_CACHE_PATH: Imports the global paths
+.note_parser import SECTION_NAMES_BY_KEY, SECTION_PATTERN, parse_note_data: The note format
+.list_all_notes import list_all_notes: Lists the note files of a directory
+.vault_snapshot import stat_signature: Returns the (mtime_ns, size) signature of a file
+argparse, concurrent.futures, json, os, re, sys, uuid, datetime
+
+Author:
+Hector Alejandro Vargas Gutierrez
+
+License:
+[Specify the license under which the package is distributed, if applicable.]
+
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from . import NOTES_DIR_INBOX, NOTES_DIR_PERMA, VALIDATION_CACHE_PATH
+from .note_parser import SECTION_NAMES_BY_KEY, SECTION_PATTERN, parse_note_data
+from .list_all_notes import list_all_notes
+from .vault_snapshot import stat_signature
+
+# Version of the checks; cached results of another version are discarded
+VALIDATION_VERSION = 1
+
+# Sections every note must have, with a value
+REQUIRED_SECTIONS = ["UUID", "Title", "ZK_UID", "Date", "Content"]
+
+# Sections whose lines must all be "Related to: ZK_UID <uid> (<description>)"
+LINK_SECTIONS = ["Links Forward to Other Notes", "Linked Backward from Other Notes"]
+LINK_PATTERN = re.compile(r"Related to: ZK_UID \S+ \(.*\)$")
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Below this number of files, starting the process pool costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+
+def _issue(filepath, line, severity, code, message):
+    """Build an issue dictionary."""
+    return {'file': filepath, 'line': line, 'severity': severity, 'code': code,
+            'message': message}
+
+
+def _read_sections(filepath, note_data):
+    """
+    Locate every section header of a note and check the headers.
+
+    Returns:
+        tuple: The sections, mapping each canonical name to its (line, value), and the issues.
+    """
+    issues = []
+    headers = list(SECTION_PATTERN.finditer(note_data))
+    sections = {}
+    for i, match in enumerate(headers):
+        name = SECTION_NAMES_BY_KEY[match.group(1).lower()]
+        line = note_data.count("\n", 0, match.start()) + 1
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(note_data)
+
+        if name in sections:
+            issues.append(_issue(filepath, line, 'error', 'duplicate-section',
+                                 f"Section '{name}' appears more than once."))
+        sections[name] = (line, note_data[match.end():end].strip())
+
+        if match.group(0) != f"{name}:":
+            issues.append(_issue(filepath, line, 'warning', 'noncanonical-header',
+                                 f"Header '{match.group(0)}' should be written '{name}:'."))
+
+    if not headers or headers[0].start() != len(note_data) - len(note_data.lstrip()):
+        issues.append(_issue(filepath, 1, 'warning', 'text-before-sections',
+                             "Text before the first section is ignored."))
+    return sections, issues
+
+
+def _check_required_sections(filepath, sections):
+    """Check that the required sections are present and not empty, and their UUID and date."""
+    issues = []
+    for name in REQUIRED_SECTIONS:
+        if name not in sections:
+            issues.append(_issue(filepath, None, 'error', 'missing-section',
+                                 f"Section '{name}' is missing."))
+        elif not sections[name][1]:
+            issues.append(_issue(filepath, sections[name][0], 'error', 'empty-section',
+                                 f"Section '{name}' is empty."))
+
+    if sections.get("UUID", (None, ""))[1]:
+        line, value = sections["UUID"]
+        try:
+            uuid.UUID(value)
+        except ValueError:
+            issues.append(_issue(filepath, line, 'error', 'invalid-uuid',
+                                 f"'{value}' is not a valid UUID."))
+
+    if sections.get("Date", (None, ""))[1]:
+        line, value = sections["Date"]
+        try:
+            datetime.strptime(value, DATE_FORMAT)
+        except ValueError:
+            issues.append(_issue(filepath, line, 'error', 'invalid-date',
+                                 f"'{value}' does not match {DATE_FORMAT}."))
+    return issues
+
+
+def _check_links(filepath, sections):
+    """Check that every line of the link sections is a well-formed link."""
+    issues = []
+    for name in LINK_SECTIONS:
+        if name in sections:
+            first_line, value = sections[name]
+            for offset, link_line in enumerate(value.split("\n")):
+                if link_line.strip() and not LINK_PATTERN.match(link_line.strip()):
+                    issues.append(_issue(filepath, first_line + 1 + offset, 'error',
+                                         'malformed-link',
+                                         f"Link line '{link_line.strip()}' is ignored."))
+    return issues
+
+
+def check_note_file(filepath):
+    """
+    Check a single note file.
+
+    Args:
+        filepath (str): The path of the note file.
+
+    Returns:
+        dict: The 'zk_uid' of the note (None if it has none) and the list of 'issues' found.
+              Each issue is a dictionary with the keys 'file', 'line', 'severity' ('error' or
+              'warning'), 'code' and 'message'.
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            note_data = f.read()
+    except (OSError, UnicodeDecodeError) as error:
+        return {'zk_uid': None, 'issues': [_issue(filepath, None, 'error', 'unreadable',
+                                                  str(error))]}
+
+    sections, issues = _read_sections(filepath, note_data)
+    issues.extend(_check_required_sections(filepath, sections))
+    issues.extend(_check_links(filepath, sections))
+
+    zk_uid = None
+    try:
+        zk_uid = parse_note_data(note_data).identifiers.zk_uid or None
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        issues.append(_issue(filepath, None, 'error', 'parse-error',
+                             f"parse_note_data failed: {error!r}"))
+
+    return {'zk_uid': zk_uid, 'issues': issues}
+
+
+def _load_cache(cache_path):
+    """Load the cached per-file results, or an empty cache."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != VALIDATION_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def _save_cache(cache_path, files):
+    """Save the per-file results, through a temporary file renamed over the old cache."""
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': VALIDATION_VERSION, 'files': files}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def _check_files(filepaths, cache, jobs):
+    """
+    Check the files whose results are not in the cache, in parallel when there are enough.
+
+    Returns:
+        tuple: The results of every file (with its 'signature', 'zk_uid' and 'issues') and the
+               number of files checked in this run.
+    """
+    results = {}
+    pending = []
+    for filepath in filepaths:
+        signature = list(stat_signature(filepath))
+        cached = cache.get(filepath)
+        if cached and cached['signature'] == signature:
+            results[filepath] = cached
+        else:
+            results[filepath] = {'signature': signature}
+            pending.append(filepath)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(pending) >= PARALLEL_THRESHOLD:
+        chunksize = max(1, len(pending) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            checked = list(executor.map(check_note_file, pending, chunksize=chunksize))
+    else:
+        checked = [check_note_file(filepath) for filepath in pending]
+    for filepath, result in zip(pending, checked):
+        results[filepath].update(result)
+    return results, len(pending)
+
+
+def _duplicate_issues(zk_uid, duplicates):
+    """Return one issue per file of a ZK_UID used by several files."""
+    issues = []
+    for position, filepath in enumerate(duplicates):
+        # Name at most three of the other files, large clashes would be quadratic
+        others = (duplicates[:position] + duplicates[position + 1:position + 4])[:3]
+        more = len(duplicates) - 1 - len(others)
+        names = ", ".join(others) + (f" and {more} more" if more else "")
+        issues.append(_issue(filepath, None, 'error', 'duplicate-zk-uid',
+                             f"ZK_UID '{zk_uid}' is also used by {names}."))
+    return issues
+
+
+def _vault_issues(filepaths, results):
+    """Check the file names and the uniqueness of the ZK_UIDs across the vault."""
+    issues = []
+    by_zk_uid = {}
+    for filepath in filepaths:
+        zk_uid = results[filepath]['zk_uid']
+        if zk_uid is None:
+            continue
+        by_zk_uid.setdefault(zk_uid, []).append(filepath)
+        if not os.path.basename(filepath).startswith(zk_uid):
+            issues.append(_issue(filepath, None, 'warning', 'filename-mismatch',
+                                 f"File name does not start with the ZK_UID '{zk_uid}'."))
+
+    for zk_uid, duplicates in by_zk_uid.items():
+        if len(duplicates) > 1:
+            issues.extend(_duplicate_issues(zk_uid, duplicates))
+    return issues
+
+
+def validate_notes(directories=None, incremental=False, jobs=None,
+                   cache_path=VALIDATION_CACHE_PATH):
+    """
+    Check every note of the given directories.
+
+    Args:
+        directories (list of str, optional): The directories holding the notes.
+                                             Defaults to [NOTES_DIR_INBOX, NOTES_DIR_PERMA].
+        incremental (bool): Reuse the cached results of files whose mtime and size did not change.
+        jobs (int, optional): The number of worker processes. Defaults to the number of cores.
+        cache_path (str): The path of the cache used by the incremental mode.
+
+    Returns:
+        dict: 'files' (number of files checked), 'rechecked' (number of files parsed in this run)
+              and 'issues' (list of issues, see check_note_file, sorted by file and line).
+    """
+    if directories is None:
+        directories = [NOTES_DIR_INBOX, NOTES_DIR_PERMA]
+
+    filepaths = []
+    for directory in directories:
+        if os.path.isdir(directory):
+            filepaths.extend(os.path.join(directory, filename)
+                             for filename in sorted(list_all_notes(directory)))
+
+    # Check the new and changed files only
+    results, rechecked = _check_files(filepaths, _load_cache(cache_path) if incremental else {},
+                                      jobs)
+    if incremental:
+        _save_cache(cache_path, results)
+
+    issues = [issue for filepath in filepaths for issue in results[filepath]['issues']]
+    # Checks across the vault are cheap and always recomputed from the per-file results
+    issues.extend(_vault_issues(filepaths, results))
+
+    issues.sort(key=lambda issue: (issue['file'], issue['line'] or 0, issue['code']))
+    return {'files': len(filepaths), 'rechecked': rechecked, 'issues': issues}
+
+
+def format_issues(report, output_format='text'):
+    """
+    Format the result of validate_notes.
+
+    Args:
+        report (dict): The result of validate_notes.
+        output_format (str): 'text' for one line per issue or 'json' for a JSON document.
+
+    Returns:
+        str: The formatted report.
+    """
+    if output_format == 'json':
+        return json.dumps(report, indent=2)
+
+    lines = []
+    for issue in report['issues']:
+        location = issue['file'] if issue['line'] is None else f"{issue['file']}:{issue['line']}"
+        lines.append(f"{location}: {issue['severity']}: {issue['message']} [{issue['code']}]")
+    errors = sum(1 for issue in report['issues'] if issue['severity'] == 'error')
+    lines.append(f"{report['files']} notes checked ({report['rechecked']} parsed), "
+                 f"{errors} errors, {len(report['issues']) - errors} warnings.")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Command line entry point, usable as a pre-commit hook.
+
+    Returns:
+        int: 1 if any error was found, otherwise 0.
+    """
+    parser = argparse.ArgumentParser(description="Validate the notes of the Zettelkasten.")
+    parser.add_argument('directories', nargs='*', help="Note directories to check.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-check files changed since the last incremental run.")
+    parser.add_argument('--format', choices=['text', 'json'], default='text',
+                        help="Output format.")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="Number of worker processes (default: number of cores).")
+    args = parser.parse_args(argv)
+
+    report = validate_notes(args.directories or None, incremental=args.incremental,
+                            jobs=args.jobs)
+    print(format_issues(report, args.format))
+    return 1 if any(issue['severity'] == 'error' for issue in report['issues']) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Tests for src/bibtex_index.py.
+"""
+from src.bibtex_index import BibtexIndex
+
+BIBTEX = """% Encoding: UTF-8
+
+@article{first,
+  title = {A title},
+  abstract = {The first line
+@handle quoted at the start of a line
+@misc{fake, not an entry}
+  the last line},
+  year = 2020
+}
+
+@book(second,
+  title = "Parenthesized {entry}",
+)
+
+@Comment{jabref-meta: databaseType:bibtex;}
+"""
+
+
+def test_at_line_inside_a_field_does_not_end_the_entry(tmp_path):
+    path = tmp_path / "reference.bib"
+    path.write_text(BIBTEX, encoding='utf-8')
+    index = BibtexIndex(str(path))
+
+    assert sorted(index.offsets) == ["first", "second"]
+    entry = index.get_entry("first")
+    assert entry['abstract'].startswith("The first line @handle")
+    assert entry['abstract'].endswith("the last line")
+    assert entry['year'] == "2020"
+    assert index.get_entry("second")['title'] == "Parenthesized {entry}"
+
+
+def test_appended_entries_are_indexed_on_refresh(tmp_path):
+    path = tmp_path / "reference.bib"
+    path.write_text(BIBTEX, encoding='utf-8')
+    index = BibtexIndex(str(path))
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("@misc{third, note = {@ at the start}}\n")
+    assert index.refresh()
+    assert index.get_entry("third")['note'] == "@ at the start"
+    assert len(index) == 3
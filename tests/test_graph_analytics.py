@@ -0,0 +1,41 @@
+"""
+Tests for src/graph_analytics.py.
+"""
+import pytest
+
+from src.graph_analytics import analyze_vault, pagerank
+from src.note_model import NoteModel, NoteIdentifiers, NoteLinks, NoteContent
+
+
+def _note(zk_uid, forward=(), backward=()):
+    return NoteModel(
+        identifiers=NoteIdentifiers(uuid="", zk_uid=zk_uid),
+        links=NoteLinks(forward=[{'ZK_UID': uid, 'Description': ""} for uid in forward],
+                        backward=[{'ZK_UID': uid, 'Description': ""} for uid in backward]),
+        contents=NoteContent(title=zk_uid, content="")
+    )
+
+
+def test_analyze_vault():
+    notes = {
+        "a.txt": _note("A", forward=["B", "C", "missing"]),
+        "b.txt": _note("B", forward=["C"], backward=["A"]),
+        "c.txt": _note("C", backward=["A"]),
+        "d.txt": _note("D"),
+    }
+    analysis = analyze_vault(notes, top=2)
+
+    assert analysis['notes'] == 4
+    assert analysis['edges'] == 3
+    assert analysis['broken_links'] == 1
+    assert analysis['orphans'] == ["D"]
+    assert analysis['components'] == [3, 1]
+    assert [hub[0] for hub in analysis['hubs']] == ["A", "B"]
+    assert analysis['pagerank'][0][0] == "C"
+
+
+def test_pagerank_sums_to_one_with_dangling_nodes():
+    rank = pagerank(4, [0, 1, 2], [1, 2, 0])
+    assert sum(rank) == pytest.approx(1.0)
+    assert rank[0] == pytest.approx(rank[1]) == pytest.approx(rank[2])
+    assert rank[3] < rank[0]
@@ -0,0 +1,50 @@
+"""
+Tests for the menu of src/main.py.
+"""
+import re
+
+from src import main
+
+
+def _run_menu(monkeypatch, capsys, choices):
+    """Run the menu with the given choices and return the printed menu options."""
+    answers = iter(choices)
+    monkeypatch.setattr("builtins.input", lambda _: next(answers))
+    main.main()
+    menu = capsys.readouterr().out.split("Zettelkasten Note Manager\n")[1]
+    return re.findall(r"^(\d+)\. (.*)$", menu, re.MULTILINE)
+
+
+def test_menu_is_numbered_in_order_and_7_exits(monkeypatch, capsys):
+    options = _run_menu(monkeypatch, capsys, ["7"])
+    assert [int(number) for number, _ in options] == list(range(1, len(options) + 1))
+    assert ("7", "Exit") in options
+
+
+def test_option_8_is_the_vault_health_report(monkeypatch, capsys):
+    calls = []
+    monkeypatch.setattr(main, "vault_health_report", lambda: calls.append("report"))
+    options = _run_menu(monkeypatch, capsys, ["8", "7"])
+    assert ("8", "Vault health report") in options
+    assert calls == ["report"]
+
+
+def test_option_9_validates_the_notes(monkeypatch, capsys):
+    calls = []
+    monkeypatch.setattr(main, "validate_all_notes", lambda: calls.append("validate"))
+    options = _run_menu(monkeypatch, capsys, ["9", "7"])
+    assert ("9", "Validate notes") in options
+    assert calls == ["validate"]
+
+
+def test_option_10_reports_invalid_queries_and_returns_to_the_menu(monkeypatch, capsys):
+    def execute_query(query):
+        assert query == "date:2024-13"
+        raise ValueError("Not a date or ZK_UID: 2024-13")
+    monkeypatch.setattr(main, "execute_query", execute_query)
+    answers = iter(["10", "date:2024-13", "n", "7"])
+    monkeypatch.setattr("builtins.input", lambda _: next(answers))
+    main.main()
+    output = capsys.readouterr().out
+    assert "10. Query notes" in output
+    assert "Invalid query: Not a date or ZK_UID: 2024-13" in output
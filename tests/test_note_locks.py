@@ -0,0 +1,153 @@
+"""
+Tests for src/note_locks.py: concurrent linkers must not lose each other's links.
+
+Run `python -m tests.test_note_locks` to print the linking throughput under contention for a
+growing number of worker processes.
+"""
+import os
+import random
+import tempfile
+import time
+from multiprocessing import Pool
+
+import pytest
+
+from src.link_notes import find_note_filepath, link_forward_notes
+from src.note_parser import parse_note_data
+from src.note_locks import lock_stripe
+from src.note_model import NoteModel, NoteIdentifiers, NoteMetadata, NoteContent
+from src.serializers import write_note
+
+# Every note gets several tags, which each locked rewrite must keep as they are
+TAGS = ['#Writing', '#Productivity', '#DailyHabits']
+
+# Source notes per worker and target notes shared by all the workers
+STRESS_NOTES_PER_WORKER = 3
+STRESS_TARGETS = 4
+
+
+def _link_worker(args):
+    """Link each source note of one worker to random target notes, counting the links made."""
+    directory, sources, targets, calls_per_source, links_per_call, seed = args
+    rng = random.Random(seed)
+    made = {}
+    for source in sources:
+        for _ in range(calls_per_source):
+            linked = rng.sample(targets, links_per_call)
+            link_forward_notes(source, [{'ZK_UID': target, 'Description': 'Stress'}
+                                        for target in linked], [directory])
+            for target in linked:
+                made[target] = made.get(target, 0) + 1
+    return made
+
+
+def _write_notes(directory, zk_uids):
+    """Write a fresh note with the stress test tags for each ZK_UID."""
+    for zk_uid in zk_uids:
+        write_note(os.path.join(directory, f"{zk_uid}-Note.txt"), NoteModel(
+            identifiers=NoteIdentifiers(uuid="", zk_uid=zk_uid),
+            metadata=NoteMetadata(tags=TAGS),
+            contents=NoteContent(title=f"Note {zk_uid}", content="Stress test note.")
+        ))
+
+
+def _check_notes(directory, expected):
+    """
+    Compare the links and tags of the notes on disk with the expected ones.
+
+    Args:
+        directory (str): The notes directory.
+        expected (dict): Maps each ZK_UID to its expected (forward, backward) link counts.
+
+    Returns:
+        tuple: The number of lost links and the ZK_UIDs of the notes whose tags changed.
+    """
+    lost = 0
+    changed_tags = []
+    for zk_uid, (forward, backward) in expected.items():
+        with open(find_note_filepath(zk_uid, [directory]), 'r', encoding='utf-8') as f:
+            note = parse_note_data(f.read())
+        if note.metadata.tags != TAGS:
+            changed_tags.append(zk_uid)
+        lost += forward - len(note.links.forward) + backward - len(note.links.backward)
+    return lost, changed_tags
+
+
+def _run_linkers(directory, workers, links_per_call, calls_per_source=3):
+    """
+    Run concurrent linkers, each over STRESS_NOTES_PER_WORKER fresh source notes that all link
+    to the same STRESS_TARGETS target notes.
+
+    Returns:
+        tuple: The number of lost links, the ZK_UIDs of the notes whose tags changed and the
+               links made per second by all the workers together.
+    """
+    target_uids = [f"20240101-{i:06d}" for i in range(STRESS_TARGETS)]
+    source_uids = [f"20240102-{i:06d}" for i in range(workers * STRESS_NOTES_PER_WORKER)]
+    _write_notes(directory, target_uids + source_uids)
+
+    jobs = [(directory, source_uids[i::workers], target_uids, calls_per_source, links_per_call, i)
+            for i in range(workers)]
+    with Pool(workers) as pool:
+        start = time.perf_counter()
+        made = pool.map(_link_worker, jobs)
+        elapsed = time.perf_counter() - start
+
+    # Every source gets all its forward links; each target gets one backward link per link made
+    expected = {zk_uid: (calls_per_source * links_per_call, 0) for zk_uid in source_uids}
+    for zk_uid in target_uids:
+        expected[zk_uid] = (0, sum(counts.get(zk_uid, 0) for counts in made))
+    lost, changed_tags = _check_notes(directory, expected)
+    return lost, changed_tags, len(source_uids) * calls_per_source * links_per_call / elapsed
+
+
+@pytest.mark.parametrize("links_per_call", [1, 3])
+def test_concurrent_linking_loses_no_links(tmp_path, monkeypatch, links_per_call):
+    # The lock files are created under the working directory
+    monkeypatch.chdir(tmp_path)
+    directory = tmp_path / "notes"
+    directory.mkdir()
+
+    lost, changed_tags, _ = _run_linkers(str(directory), workers=8,
+                                         links_per_call=links_per_call)
+    assert lost == 0
+    assert not changed_tags
+
+
+def test_lock_stripe_is_stable_and_bounded():
+    assert lock_stripe("notes/inbox/a.txt") == lock_stripe(os.path.abspath("notes/inbox/a.txt"))
+    assert all(0 <= lock_stripe(f"note-{i}.txt", stripes=8) < 8 for i in range(100))
+
+
+def benchmark_linking(worker_counts=(1, 2, 4, 8), calls_per_source=10, links_per_call=3):
+    """
+    Measure the linking throughput when every worker links to the same few target notes.
+
+    Args:
+        worker_counts (tuple of int): The numbers of concurrent worker processes to measure.
+        calls_per_source (int): The number of link_forward_notes calls per source note.
+        links_per_call (int): The number of targets linked by each call.
+
+    Returns:
+        list of tuple: One (workers, links/s, lost links) row per worker count.
+    """
+    results = []
+    cwd = os.getcwd()
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            # The lock files are created under the working directory
+            os.chdir(tmp)
+            try:
+                os.mkdir("notes")
+                lost, _, rate = _run_linkers(os.path.join(tmp, "notes"), workers,
+                                             links_per_call, calls_per_source)
+            finally:
+                os.chdir(cwd)
+        results.append((workers, rate, lost))
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'workers':>8}{'links/s':>12}{'lost':>8}")
+    for row in benchmark_linking():
+        print(f"{row[0]:>8}{row[1]:>12.0f}{row[2]:>8}")
@@ -0,0 +1,64 @@
+"""
+Tests for src/query_notes.py: query parsing and the persisted query index.
+"""
+import os
+
+import pytest
+
+from src.note_model import NoteModel, NoteIdentifiers, NoteMetadata, NoteContent
+from src.query_notes import Predicate, QueryIndex, execute_query, parse_query
+from src.serializers import write_note
+
+
+def _write(directory, zk_uid, tags, content="Content."):
+    filepath = os.path.join(directory, f"{zk_uid}-Note.txt")
+    write_note(filepath, NoteModel(
+        identifiers=NoteIdentifiers(uuid="", zk_uid=zk_uid),
+        date="2024-08-23 10:00:00",
+        metadata=NoteMetadata(tags=tags),
+        contents=NoteContent(title=f"Note {zk_uid}", content=content)
+    ))
+    return filepath
+
+
+def test_unknown_fields_are_text_predicates():
+    assert parse_query('tag:#Idea 10:00 http://example.com "two words"') == [
+        Predicate("tag", "#Idea"),
+        Predicate("text", "10:00"),
+        Predicate("text", "http://example.com"),
+        Predicate("text", "two words"),
+    ]
+
+
+def test_invalid_date_raises_value_error():
+    index = QueryIndex.build({})
+    with pytest.raises(ValueError):
+        execute_query("date:2024-13", index)
+
+
+def test_refresh_reuses_the_persisted_postings(tmp_path, monkeypatch):
+    # The lock files are created under the working directory
+    monkeypatch.chdir(tmp_path)
+    directory = tmp_path / "notes"
+    directory.mkdir()
+    paths = {'cache_path': str(tmp_path / "query.json"),
+             'snapshot_path': str(tmp_path / "snapshot.bin"),
+             'timeline_path': str(tmp_path / "timeline.bin")}
+    first = _write(str(directory), "20240801-100000", ["#Idea"])
+    _write(str(directory), "20240901-100000", ["#Other"])
+
+    index, stages = QueryIndex.refresh([str(directory)], **paths)
+    assert [stage.strategy for stage in stages] == ["refresh", "build"]
+    results, _ = execute_query("tag:idea date:2024-08", index)
+    assert results == [first]
+
+    index, stages = QueryIndex.refresh([str(directory)], **paths)
+    assert [stage.strategy for stage in stages] == ["refresh", "cached"]
+    assert stages[0].detail == "vault snapshot unchanged"
+    assert execute_query("tag:idea date:2024-08", index)[0] == [first]
+
+    # A note changed outside the application invalidates the postings
+    third = _write(str(directory), "20240815-100000", ["#Idea"], content="Changed.")
+    index, stages = QueryIndex.refresh([str(directory)], **paths)
+    assert [stage.strategy for stage in stages] == ["refresh", "build"]
+    assert execute_query("tag:idea date:2024-08", index)[0] == [first, third]
@@ -0,0 +1,58 @@
+"""
+Tests for src/search_notes.py: literal and regular expression keywords in one batch.
+"""
+from src.search_notes import is_literal, search_notes_batch
+
+# Backtracks exponentially on a long run of "a" that does not end the string
+PATHOLOGICAL = r"(a+)+$"
+
+
+def _write(directory, name, content):
+    (directory / name).write_text(content, encoding='utf-8')
+
+
+def test_literals_and_patterns_in_one_batch(tmp_path):
+    _write(tmp_path, "one.txt", "Deep Work and ZK_UID 20240823-100000")
+    _write(tmp_path, "two.txt", "deep work only")
+    _write(tmp_path, "ignored.md", "Deep Work")
+
+    result = search_notes_batch(["deep work", r"\d{8}-\d{6}"], str(tmp_path))
+    assert sorted(result.matches["deep work"]) == ["one.txt", "two.txt"]
+    assert result.matches[r"\d{8}-\d{6}"] == ["one.txt"]
+    assert result.skipped == []
+
+
+def test_slow_pattern_does_not_skip_the_other_patterns(tmp_path):
+    _write(tmp_path, "slow.txt", "a" * 40 + "!" + " zettel 2024")
+
+    result = search_notes_batch([PATHOLOGICAL, r"zett?el", r"\d{4}", "ZETTEL"], str(tmp_path),
+                                time_budget=0.5)
+    assert result.matches == {PATHOLOGICAL: [], r"zett?el": ["slow.txt"],
+                              r"\d{4}": ["slow.txt"], "ZETTEL": ["slow.txt"]}
+    assert result.skipped == [("slow.txt", f"regex {PATHOLOGICAL!r} took longer than 0.5 s")]
+
+
+def test_size_budget_and_invalid_files_are_reported(tmp_path):
+    _write(tmp_path, "large.txt", "zettel " * 100)
+    (tmp_path / "binary.txt").write_bytes(b"\xff\xfe zettel")
+
+    result = search_notes_batch([r"zett?el", "zettel"], str(tmp_path), size_budget=100)
+    assert result.matches == {r"zett?el": [], "zettel": ["large.txt"]}
+    assert sorted(result.skipped) == [("binary.txt", "not valid UTF-8"),
+                                      ("large.txt", "larger than 100 bytes")]
+
+
+def test_is_literal():
+    assert is_literal("deep work")
+    assert not is_literal(r"\d+")
+
+
+def test_invalid_regular_expressions_are_searched_as_typed(tmp_path):
+    _write(tmp_path, "draft.txt", "An idea (Draft) to revisit, *note* included")
+    _write(tmp_path, "final.txt", "A final idea")
+
+    result = search_notes_batch(["(draft", "*note", "id.a"], str(tmp_path))
+    assert result.matches["(draft"] == ["draft.txt"]
+    assert result.matches["*note"] == ["draft.txt"]
+    assert sorted(result.matches["id.a"]) == ["draft.txt", "final.txt"]
+    assert result.skipped == []
@@ -0,0 +1,169 @@
+"""
+Tests for src/serializers.py: randomized round-trips and the text format.
+"""
+import random
+
+import pytest
+
+from src.note_model import NoteModel, NoteIdentifiers, NoteLinks, NoteMetadata, NoteContent
+from src.serializers import (SERIALIZERS, BinarySerializer, JsonSerializer, NoteSerializer,
+                             TextSerializer, write_note)
+
+# Characters of the random strings: ASCII, accents, CJK, emoji, separators and newlines
+ALPHABET = "abcXYZ019 ,.:=@#()\n\téñüßçÅ漢字ノート😀€"
+
+# Characters the text format keeps as they are: no section header separators (":", "="),
+# list separators (",") or link parentheses
+TEXT_ALPHABET = "abcXYZ019.#@éñüßçÅ漢字ノート😀€"
+
+ROUNDS = 300
+
+
+def _random_text(rng, max_length=40):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+
+def _maybe_none(rng, value):
+    return None if rng.random() < 0.25 else value
+
+
+def _random_note(rng):
+    """Build a note with random fields, some of them None or empty."""
+    return NoteModel(
+        identifiers=NoteIdentifiers(uuid=_maybe_none(rng, _random_text(rng)),
+                                    zk_uid=_maybe_none(rng, _random_text(rng, 15))),
+        date=_maybe_none(rng, _random_text(rng, 19)),
+        metadata=NoteMetadata(
+            references=[_random_text(rng) for _ in range(rng.randint(0, 4))],
+            tags=[_random_text(rng, 10) for _ in range(rng.randint(0, 4))]
+        ),
+        links=NoteLinks(
+            forward=[{'ZK_UID': _random_text(rng, 15), 'Description': _random_text(rng)}
+                     for _ in range(rng.randint(0, 4))],
+            backward=[{'ZK_UID': _random_text(rng, 15), 'Description': _random_text(rng)}
+                      for _ in range(rng.randint(0, 4))]
+        ),
+        contents=NoteContent(
+            title=_random_text(rng),
+            content=_random_text(rng, 400),
+            thoughts_connections=_maybe_none(rng, _random_text(rng, 100))
+        )
+    )
+
+
+def _baseline_str(note):
+    """The text format as NoteModel.__str__ built it before it was rewritten with one join."""
+    note_str = f"UUID: {note.identifiers.uuid}\n"
+    note_str += f"Title: {note.contents.title}\n"
+    note_str += f"ZK_UID: {note.identifiers.zk_uid}\n"
+    note_str += f"Date: {note.date}\n"
+    note_str += f"Content:\n{note.contents.content}\n"
+    if note.metadata.references:
+        note_str += f"References:\n{', '.join(note.metadata.references)}\n"
+    note_str += f"Tags: {', '.join(note.metadata.tags)}\n" if note.metadata.tags else ""
+    if note.links.forward:
+        note_str += "Links Forward to Other Notes:\n"
+        for link in note.links.forward:
+            note_str += f"Related to: ZK_UID {link['ZK_UID']} ({link['Description']})\n"
+    if note.links.backward:
+        note_str += "Linked Backward from Other Notes:\n"
+        for link in note.links.backward:
+            note_str += f"Related to: ZK_UID {link['ZK_UID']} ({link['Description']})\n"
+    if note.contents.thoughts_connections:
+        note_str += f"Thoughts/Connections:\n{note.contents.thoughts_connections}\n"
+    return note_str
+
+
+@pytest.mark.parametrize("serializer", [JsonSerializer(), BinarySerializer()],
+                         ids=lambda serializer: serializer.name)
+def test_random_notes_round_trip(serializer):
+    rng = random.Random(20240823)
+    for _ in range(ROUNDS):
+        note = _random_note(rng)
+        data = serializer.serialize(note)
+        assert isinstance(data, bytes if serializer.binary else str)
+        assert serializer.deserialize(data) == note
+
+
+def test_none_fields_round_trip():
+    note = NoteModel(identifiers=NoteIdentifiers(uuid=None, zk_uid=None), date=None,
+                     contents=NoteContent(title="", content="", thoughts_connections=None))
+    for serializer in (JsonSerializer(), BinarySerializer()):
+        assert serializer.deserialize(serializer.serialize(note)) == note
+
+
+def test_text_output_matches_the_previous_str():
+    rng = random.Random(7)
+    for _ in range(ROUNDS):
+        note = _random_note(rng)
+        assert TextSerializer().serialize(note).encode('utf-8') == \
+            _baseline_str(note).encode('utf-8')
+
+
+def _random_words(rng, max_words=5, alphabet=TEXT_ALPHABET):
+    """Words of the text alphabet separated by single spaces, at least one word."""
+    return " ".join("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8)))
+                    for _ in range(rng.randint(1, max_words)))
+
+
+def _random_text_note(rng):
+    """Build a random note the text format can represent: every scalar field set and trimmed."""
+    return NoteModel(
+        identifiers=NoteIdentifiers(uuid=_random_words(rng, 1), zk_uid=_random_words(rng, 1)),
+        date=_random_words(rng, 2),
+        metadata=NoteMetadata(
+            references=[_random_words(rng) for _ in range(rng.randint(0, 4))],
+            tags=["#" + _random_words(rng, 1) for _ in range(rng.randint(0, 5))]
+        ),
+        links=NoteLinks(
+            forward=[{'ZK_UID': _random_words(rng, 1), 'Description': _random_words(rng)}
+                     for _ in range(rng.randint(0, 4))],
+            backward=[{'ZK_UID': _random_words(rng, 1), 'Description': _random_words(rng)}
+                      for _ in range(rng.randint(0, 4))]
+        ),
+        contents=NoteContent(
+            title=_random_words(rng),
+            content="\n".join(_random_words(rng, 10) for _ in range(rng.randint(1, 5))),
+            thoughts_connections=_random_words(rng)
+        )
+    )
+
+
+def test_random_notes_text_round_trip():
+    rng = random.Random(20240824)
+    serializer = TextSerializer()
+    for _ in range(ROUNDS):
+        note = _random_text_note(rng)
+        assert serializer.deserialize(serializer.serialize(note)) == note
+
+
+def test_text_round_trip_of_a_regular_note():
+    note = NoteModel(
+        identifiers=NoteIdentifiers(uuid="e2f9c93b-9f8b-4e0a-93a8-77de7453348b",
+                                    zk_uid="20240823-100000"),
+        date="2024-08-23 10:00:00",
+        metadata=NoteMetadata(references=["Source: @calnewport2016deepwork"],
+                              tags=["#Écriture", "#Productivity", "#DailyHabits"]),
+        links=NoteLinks(forward=[{'ZK_UID': "20240822-003", 'Description': "Morgenroutine"}]),
+        contents=NoteContent(title="Tägliches Schreiben", content="Línea uno.\nLínea dos.",
+                             thoughts_connections="漢字")
+    )
+    serializer = TextSerializer()
+    assert serializer.deserialize(serializer.serialize(note)) == note
+
+
+def test_serializer_interface_is_abstract():
+    with pytest.raises(TypeError):
+        NoteSerializer()  # pylint: disable=abstract-class-instantiated
+
+
+@pytest.mark.parametrize("name", sorted(SERIALIZERS))
+def test_write_note_leaves_no_temporary_file(tmp_path, name):
+    serializer = SERIALIZERS[name]
+    note = _random_note(random.Random(1))
+    filepath = tmp_path / "20240823-100000-Note.txt"
+    write_note(str(filepath), note, serializer)
+
+    assert [path.name for path in tmp_path.iterdir()] == [filepath.name]
+    data = filepath.read_bytes() if serializer.binary else filepath.read_text(encoding='utf-8')
+    assert data == serializer.serialize(note)
@@ -0,0 +1,95 @@
+"""
+Tests for src/timeline_index.py.
+"""
+import os
+
+from src.note_model import NoteModel, NoteIdentifiers, NoteContent
+from src.serializers import write_note
+from src.timeline_index import (TimelineIndex, add_note_to_timeline, note_timeline_key,
+                                refresh_timeline, to_timeline_key)
+
+
+def _write(directory, zk_uid):
+    filepath = os.path.join(directory, f"{zk_uid}-Note.txt")
+    note = NoteModel(identifiers=NoteIdentifiers(uuid="", zk_uid=zk_uid),
+                     date="2024-08-23 10:00:00",
+                     contents=NoteContent(title=f"Note {zk_uid}", content="Content."))
+    write_note(filepath, note)
+    return filepath, note
+
+
+def test_refresh_picks_up_notes_changed_outside_create_note(tmp_path, monkeypatch):
+    # The lock files are created under the working directory
+    monkeypatch.chdir(tmp_path)
+    directory = str(tmp_path)
+    paths = {'path': str(tmp_path / "timeline.bin"),
+             'snapshot_path': str(tmp_path / "snapshot.bin")}
+    first, _ = _write(directory, "20240801-100000")
+    second, _ = _write(directory, "20240901-100000")
+
+    index = refresh_timeline([directory], **paths)
+    assert index.range("2024-08", "2024-09") == [("20240801-100000", first)]
+    assert TimelineIndex.load(paths['path']).filepaths == [first, second]
+
+    # A note imported by hand and a deleted note
+    third, _ = _write(directory, "20240815-120000")
+    os.remove(second)
+    index = refresh_timeline([directory], **paths)
+    assert index.filepaths == [first, third]
+    assert index.histogram(by='month') == [("2024-08", 2)]
+
+    # Nothing changed: the persisted index is used as it is, without loading the notes
+    signature = index.source_signature
+
+    def fail(*_):
+        raise AssertionError("the notes were loaded")
+    monkeypatch.setattr("src.timeline_index.refresh_snapshot", fail)
+    assert refresh_timeline([directory], **paths).source_signature == signature
+
+
+def test_added_note_is_kept_until_the_next_rebuild(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    directory = str(tmp_path)
+    paths = {'path': str(tmp_path / "timeline.bin"),
+             'snapshot_path': str(tmp_path / "snapshot.bin")}
+    first, _ = _write(directory, "20240801-100000")
+    refresh_timeline([directory], **paths)
+
+    second, note = _write(directory, "20240802-100000")
+    add_note_to_timeline(note, second, paths['path'])
+    assert TimelineIndex.load(paths['path']).filepaths == [first, second]
+    assert refresh_timeline([directory], **paths).filepaths == [first, second]
+
+
+def test_range_bounds(tmp_path):
+    index = TimelineIndex(str(tmp_path / "timeline.bin"))
+    for key, zk_uid in ((20240801100000, "a"), (20240802100000, "b"), (20240803100000, "c")):
+        index.add(key, zk_uid, f"{zk_uid}.txt")
+    assert [uid for uid, _ in index.range("2024-08-02")] == ["b", "c"]
+    assert [uid for uid, _ in index.range(end="2024-08-02")] == ["a"]
+    assert not index.range("2024-08-03", "2024-08-01")
+    assert [uid for uid, _ in index.recent(2)] == ["c", "b"]
+
+
+def test_sequence_numbered_zk_uids_use_the_date_field():
+    assert to_timeline_key("20240822-100000") == 20240822100000
+    assert to_timeline_key("20240822-003") is None
+    note = NoteModel(identifiers=NoteIdentifiers(uuid="", zk_uid="20240822-003"),
+                     date="2024-08-22 09:15:00")
+    assert note_timeline_key(note) == 20240822091500
+
+
+def test_truncated_index_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    directory = str(tmp_path)
+    paths = {'path': str(tmp_path / "timeline.bin"),
+             'snapshot_path': str(tmp_path / "snapshot.bin")}
+    first, _ = _write(directory, "20240801-100000")
+    refresh_timeline([directory], **paths)
+    with open(paths['path'], 'rb') as f:
+        data = f.read()
+
+    for length in range(len(data)):
+        with open(paths['path'], 'wb') as f:
+            f.write(data[:length])
+        assert refresh_timeline([directory], **paths).filepaths == [first]
@@ -0,0 +1,61 @@
+"""
+Tests for src/validate_notes.py.
+"""
+from src.validate_notes import check_note_file, validate_notes
+
+VALID_NOTE = """UUID: e2f9c93b-9f8b-4e0a-93a8-77de7453348b
+Title: A note
+ZK_UID: 20240823-100000
+Date: 2024-08-23 10:00:00
+Content:
+Some content.
+Links Forward to Other Notes:
+Related to: ZK_UID 20240822-003 (Morning routine)
+"""
+
+BROKEN_NOTE = """Stray text
+uuid = not-a-uuid
+Title: A note
+ZK_UID: 20240823-100001
+Date : 2024-13-01
+Links Forward to Other Notes:
+not a link
+Title: Again
+"""
+
+
+def _codes(issues):
+    return sorted(issue['code'] for issue in issues)
+
+
+def test_valid_note_has_no_issues(tmp_path):
+    filepath = tmp_path / "20240823-100000-A_note.txt"
+    filepath.write_text(VALID_NOTE, encoding='utf-8')
+    result = check_note_file(str(filepath))
+    assert result == {'zk_uid': "20240823-100000", 'issues': []}
+
+
+def test_broken_note_issues(tmp_path):
+    filepath = tmp_path / "20240823-100001-Broken.txt"
+    filepath.write_text(BROKEN_NOTE, encoding='utf-8')
+    issues = check_note_file(str(filepath))['issues']
+    assert _codes(issues) == ['duplicate-section', 'invalid-date', 'invalid-uuid',
+                              'malformed-link', 'missing-section', 'noncanonical-header',
+                              'noncanonical-header', 'text-before-sections']
+    assert {issue['line'] for issue in issues if issue['code'] == 'malformed-link'} == {7}
+
+
+def test_vault_checks_and_incremental_cache(tmp_path):
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    for name in ("20240823-100000-A.txt", "20240823-100000-B.txt", "renamed.txt"):
+        (notes / name).write_text(VALID_NOTE, encoding='utf-8')
+    cache_path = str(tmp_path / "cache.json")
+
+    report = validate_notes([str(notes)], incremental=True, jobs=1, cache_path=cache_path)
+    assert report['rechecked'] == 3
+    assert _codes(report['issues']) == ['duplicate-zk-uid'] * 3 + ['filename-mismatch']
+
+    again = validate_notes([str(notes)], incremental=True, jobs=1, cache_path=cache_path)
+    assert again['rechecked'] == 0
+    assert again['issues'] == report['issues']
@@ -0,0 +1,79 @@
+"""
+Tests for src/vault_snapshot.py.
+"""
+import os
+
+from src.note_model import NoteModel, NoteIdentifiers, NoteLinks, NoteMetadata, NoteContent
+from src.serializers import write_note
+from src.vault_snapshot import HEADER, load_snapshot, refresh_snapshot, save_snapshot
+
+
+def _note(zk_uid, content="Content."):
+    return NoteModel(
+        identifiers=NoteIdentifiers(uuid="e2f9c93b-9f8b-4e0a-93a8-77de7453348b", zk_uid=zk_uid),
+        date="2024-08-23 10:00:00",
+        metadata=NoteMetadata(references=["Source: @key"], tags=["#Ñote"]),
+        links=NoteLinks(forward=[{'ZK_UID': "20240822-003", 'Description': "Related"}]),
+        contents=NoteContent(title=f"Note {zk_uid}", content=content, thoughts_connections="")
+    )
+
+
+def test_entries_round_trip(tmp_path):
+    snapshot_path = str(tmp_path / "snapshot.bin")
+    entries = {f"notes/{i}.txt": (i, 10 * i, _note(f"20240823-{i:06d}")) for i in range(50)}
+    save_snapshot(entries, snapshot_path)
+    assert load_snapshot(snapshot_path) == entries
+
+
+def test_strings_containing_the_separator_round_trip(tmp_path):
+    snapshot_path = str(tmp_path / "snapshot.bin")
+    entries = {"a.txt": (1, 2, _note("20240823-000001", "NUL \x00 inside")),
+               "b.txt": (3, 4, _note("20240823-000002"))}
+    save_snapshot(entries, snapshot_path)
+    assert load_snapshot(snapshot_path) == entries
+
+
+def test_empty_snapshot_round_trips(tmp_path):
+    snapshot_path = str(tmp_path / "snapshot.bin")
+    save_snapshot({}, snapshot_path)
+    assert not load_snapshot(snapshot_path)
+
+
+def test_refresh_reparses_changed_files_and_rebuilds_old_snapshots(tmp_path):
+    directory = tmp_path / "notes"
+    directory.mkdir()
+    snapshot_path = str(tmp_path / "snapshot.bin")
+    first = str(directory / "20240823-000001-First.txt")
+    second = str(directory / "20240823-000002-Second.txt")
+    write_note(first, _note("20240823-000001"))
+    write_note(second, _note("20240823-000002"))
+
+    # A snapshot written by an older format version is rebuilt instead of failing
+    with open(snapshot_path, 'wb') as f:
+        f.write(HEADER.pack(b"ZKVS", 1, 0, 0, 0))
+    notes = refresh_snapshot([str(directory)], snapshot_path)
+    assert sorted(notes) == [first, second]
+
+    write_note(first, _note("20240823-000001", "Changed content."))
+    os.remove(second)
+    notes = refresh_snapshot([str(directory)], snapshot_path)
+    assert list(notes) == [first]
+    assert notes[first].contents.content == "Changed content."
+    assert load_snapshot(snapshot_path)[first][2] == notes[first]
+
+
+def test_truncated_snapshots_are_rebuilt(tmp_path):
+    directory = tmp_path / "notes"
+    directory.mkdir()
+    snapshot_path = str(tmp_path / "snapshot.bin")
+    filepath = str(directory / "20240823-000001-First.txt")
+    write_note(filepath, _note("20240823-000001", "Ñote with multi-byte characters."))
+    refresh_snapshot([str(directory)], snapshot_path)
+    with open(snapshot_path, 'rb') as f:
+        data = f.read()
+
+    for length in range(len(data)):
+        with open(snapshot_path, 'wb') as f:
+            f.write(data[:length])
+        assert list(refresh_snapshot([str(directory)], snapshot_path)) == [filepath]
+        assert list(load_snapshot(snapshot_path)) == [filepath]